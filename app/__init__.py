@@ -1,9 +1,33 @@
-from .storage import Storage
-from .scraper import Scraper
-from .config import config
-from .evaluator import Evaluator
-from .notifier import get_notifier
-from .logger import logger
-from .linkedin_scraper import LinkedinScraper
-
-__all__ = ["Storage", "Scraper", "config", "Evaluator", "get_notifier", "logger", "LinkedinScraper"]
\ No newline at end of file
+import importlib
+
+# Os módulos só são importados no primeiro acesso: comandos que apenas leem o banco
+# não carregam o navegador, o Telegram nem o cliente HTTP
+_EXPORTS = {
+	"Storage": ".storage",
+	"Scraper": ".scraper",
+	"config": ".config",
+	"Evaluator": ".evaluator",
+	"get_notifier": ".notifier",
+	"logger": ".logger",
+	"LinkedinScraper": ".linkedin_scraper",
+	"Pipeline": ".pipeline",
+	"EvaluationCache": ".cache",
+	"Prefilter": ".prefilter",
+	"NearDuplicateIndex": ".dedup",
+	"RateLimiter": ".ratelimit",
+	"Daemon": ".daemon",
+	"telemetry": ".telemetry",
+	"Source": ".sources",
+	"register_source": ".sources",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+	if name not in _EXPORTS:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+	value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+	globals()[name] = value
+	return value
@@ -0,0 +1,150 @@
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+from .logger import logger
+
+
+class DomainLimiter:
+	def __init__(self, max_per_domain=4, delay_s=0.0):
+		self.max_per_domain = max(1, max_per_domain)
+		self.delay_s = delay_s
+		self._semaphores = {}
+
+	def _semaphore(self, url):
+		domain = urlparse(url).netloc
+		if domain not in self._semaphores:
+			self._semaphores[domain] = asyncio.Semaphore(self.max_per_domain)
+		return self._semaphores[domain]
+
+	@asynccontextmanager
+	async def limit(self, url):
+		async with self._semaphore(url):
+			yield
+			# Mantém o slot ocupado durante o intervalo para espaçar as requisições
+			if self.delay_s > 0:
+				await asyncio.sleep(self.delay_s)
+
+
+class PagePool:
+	def __init__(self, context, size=4):
+		self.context = context
+		self.size = max(1, size)
+		self._idle = asyncio.Queue()
+		self._pages = []
+		self._creating = 0
+
+	@asynccontextmanager
+	async def page(self):
+		page = await self._acquire()
+		try:
+			yield page
+		finally:
+			self._release(page)
+
+	async def _acquire(self):
+		if self._idle.empty() and len(self._pages) + self._creating < self.size:
+			return await self._new_page()
+
+		page = await self._idle.get()
+		if page is None:
+			# Uma página do pool foi fechada; abre outra no lugar dela
+			return await self._new_page()
+		return page
+
+	async def _new_page(self):
+		self._creating += 1
+		try:
+			page = await self.context.new_page()
+		finally:
+			self._creating -= 1
+		self._pages.append(page)
+		logger.debug(f"Nova página aberta no pool ({len(self._pages)}/{self.size})")
+		return page
+
+	def _release(self, page):
+		if page.is_closed():
+			self._pages.remove(page)
+			self._idle.put_nowait(None)
+			return
+		self._idle.put_nowait(page)
+
+	async def close(self):
+		for page in self._pages:
+			if not page.is_closed():
+				await page.close()
+		self._pages.clear()
+		self._idle = asyncio.Queue()
+
+
+# Domínios de analytics/anúncios que nunca contribuem com o conteúdo lido pelos scrapers
+TRACKER_DOMAINS = [
+	"google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+	"googleadservices.com", "facebook.net", "connect.facebook.net", "hotjar.com", "clarity.ms",
+	"ads.linkedin.com", "px.ads.linkedin.com", "snap.licdn.com", "segment.io", "sentry.io",
+]
+
+# Tamanho típico (bytes) de cada tipo de recurso, usado só para estimar a economia
+TYPICAL_SIZES = {"image": 40_000, "media": 500_000, "font": 60_000, "stylesheet": 30_000, "script": 80_000}
+
+
+def _domain_matches(host, domains):
+	return any(host == d or host.endswith(f".{d}") for d in domains)
+
+
+class ResourceBlocker:
+	def __init__(self, blocked_types=("image", "media", "font"), allowed_domains=None, blocked_domains=TRACKER_DOMAINS):
+		self.blocked_types = set(blocked_types)
+		self.allowed_domains = [d.lower() for d in allowed_domains or []]
+		self.blocked_domains = [d.lower() for d in blocked_domains or []]
+		self.blocked = Counter()
+		self.loaded = 0
+		self.loaded_bytes = 0
+
+	async def install(self, context):
+		await context.route("**/*", self._handle)
+		context.on("response", self._on_response)
+
+	def should_block(self, url, resource_type):
+		if resource_type in self.blocked_types:
+			return True
+
+		host = (urlparse(url).hostname or "").lower()
+		if not host:
+			return False
+		if _domain_matches(host, self.blocked_domains):
+			return True
+		return bool(self.allowed_domains) and not _domain_matches(host, self.allowed_domains)
+
+	async def _handle(self, route):
+		request = route.request
+		try:
+			if self.should_block(request.url, request.resource_type):
+				self.blocked[request.resource_type] += 1
+				await route.abort()
+			else:
+				await route.continue_()
+		except Exception as e:
+			# A página pode ter sido fechada enquanto a requisição estava pendente
+			logger.debug(f"Falha ao rotear requisição {request.url}: {e}")
+
+	def _on_response(self, response):
+		self.loaded += 1
+		try:
+			self.loaded_bytes += int(response.headers.get("content-length") or 0)
+		except ValueError:
+			pass
+
+	def reset_stats(self):
+		self.blocked.clear()
+		self.loaded = 0
+		self.loaded_bytes = 0
+
+	def stats(self):
+		return {
+			"blocked": sum(self.blocked.values()),
+			"blocked_by_type": dict(self.blocked),
+			"loaded": self.loaded,
+			"loaded_bytes": self.loaded_bytes,
+			"saved_bytes": sum(TYPICAL_SIZES.get(t, 10_000) * n for t, n in self.blocked.items()),
+		}
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from .logger import logger
+
+
+def normalize_text(text):
+	text = unicodedata.normalize("NFKC", text or "")
+	return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class EvaluationCache:
+	PRUNE_EVERY = 100
+
+	def __init__(self, db_path="data/jobs.db", ttl_days=30, max_entries=20000, read_only=False):
+		self.db_path = db_path
+		# No --dry-run o cache só é consultado: nada é gravado, renovado ou removido
+		self.read_only = read_only
+		self.ttl_s = ttl_days * 86400 if ttl_days else None
+		self.max_entries = max_entries
+		self.hits = 0
+		self.misses = 0
+		self._writes = 0
+		self._lock = threading.Lock()
+
+		db_dir = os.path.dirname(self.db_path)
+		if db_dir:
+			os.makedirs(db_dir, exist_ok=True)
+
+		# As avaliações rodam em threads do pipeline, então a conexão é compartilhada com lock
+		self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+		self._conn.execute("PRAGMA busy_timeout=30000")
+		self._init_db()
+		self.prune()
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
+
+	def _init_db(self):
+		with self._lock, self._conn:
+			self._conn.execute("""
+				CREATE TABLE IF NOT EXISTS eval_cache (
+					key TEXT PRIMARY KEY,
+					result JSON,
+					model TEXT,
+					created_at REAL,
+					last_hit_at REAL,
+					hits INTEGER DEFAULT 0
+				)
+			""")
+			self._conn.execute("CREATE INDEX IF NOT EXISTS idx_eval_cache_last_hit ON eval_cache (last_hit_at)")
+
+	@staticmethod
+	def make_key(kind, content, resume_text, profile, model, prompt_version):
+		payload = json.dumps({
+			"kind": kind,
+			"content": normalize_text(content),
+			"resume": normalize_text(resume_text),
+			"profile": profile,
+			"model": model,
+			"prompt_version": prompt_version,
+		}, ensure_ascii=False, sort_keys=True, default=str)
+		return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+	def get(self, key):
+		now = time.time()
+		try:
+			with self._lock, self._conn:
+				row = self._conn.execute(
+					"SELECT result, created_at FROM eval_cache WHERE key = ?", (key,)
+				).fetchone()
+
+				if row and self.ttl_s and row[1] < now - self.ttl_s:
+					if not self.read_only:
+						self._conn.execute("DELETE FROM eval_cache WHERE key = ?", (key,))
+					row = None
+
+				if not row:
+					self.misses += 1
+					return None
+
+				self.hits += 1
+				if self.read_only:
+					return json.loads(row[0])
+
+				self._conn.execute(
+					"UPDATE eval_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?", (now, key)
+				)
+				return json.loads(row[0])
+		except Exception:
+			logger.exception("Erro ao consultar cache de avaliações")
+			return None
+
+	def put(self, key, result, model=None):
+		if self.read_only:
+			return
+		now = time.time()
+		try:
+			with self._lock, self._conn:
+				self._conn.execute("""
+					INSERT OR REPLACE INTO eval_cache (key, result, model, created_at, last_hit_at, hits)
+					VALUES (?, ?, ?, ?, ?, 0)
+				""", (key, json.dumps(result, ensure_ascii=False), model, now, now))
+				self._writes += 1
+		except Exception:
+			logger.exception("Erro ao gravar no cache de avaliações")
+			return
+
+		if self._writes % self.PRUNE_EVERY == 0:
+			self.prune()
+
+	def prune(self):
+		if self.read_only:
+			return
+		try:
+			with self._lock, self._conn:
+				removed = 0
+				if self.ttl_s:
+					cur = self._conn.execute(
+						"DELETE FROM eval_cache WHERE created_at < ?", (time.time() - self.ttl_s,)
+					)
+					removed += cur.rowcount
+
+				if self.max_entries:
+					cur = self._conn.execute("""
+						DELETE FROM eval_cache WHERE key IN (
+							SELECT key FROM eval_cache ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?
+						)
+					""", (self.max_entries,))
+					removed += cur.rowcount
+
+			if removed:
+				logger.debug(f"Cache de avaliações: {removed} entradas removidas")
+		except Exception:
+			logger.exception("Erro ao limpar cache de avaliações")
+
+	def reset_stats(self):
+		self.hits = 0
+		self.misses = 0
+
+	def stats(self):
+		total = self.hits + self.misses
+		return {
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": self.hits / total if total else 0.0,
+		}
@@ -1,6 +1,6 @@
 import os
+from functools import cached_property
 from pathlib import Path
-import yaml
 from dotenv import load_dotenv
 
 class Config:
@@ -11,20 +11,80 @@ class Config:
 
 		self.project_root = Path(__file__).resolve().parent.parent
 		self.db_path = os.getenv("DB_PATH", "data/jobs.db")
-
-		self.profile = self._load_yaml("profile.yaml")
-		self.resume = self._load_text("resume.md")
+		self.storage_compress_min_bytes = int(os.getenv("STORAGE_COMPRESS_MIN_BYTES", "512"))
+		self.retention_days = int(os.getenv("RETENTION_DAYS", "180"))
+		self.retention_min_score = float(os.getenv("RETENTION_MIN_SCORE", "0"))
+		self.storage_compact_interval = float(os.getenv("STORAGE_COMPACT_INTERVAL", "24"))
 
 		self.api_key = os.getenv("API_KEY") or os.getenv("OPENIA_API_KEY")
 		self.model = os.getenv("LLM_MODEL", "gpt-4o-mini")
+		self.llm_base_url = os.getenv("LLM_BASE_URL", "https://api.openai.com/v1")
+		self.escalation_model = os.getenv("LLM_ESCALATION_MODEL") or None
+		self.escalation_band = float(os.getenv("LLM_ESCALATION_BAND", "15"))
+		self.escalation_min_confidence = float(os.getenv("LLM_ESCALATION_MIN_CONFIDENCE", "0.6"))
+		self.eval_cache_ttl_days = int(os.getenv("EVAL_CACHE_TTL_DAYS", "30"))
+		self.eval_cache_max_entries = int(os.getenv("EVAL_CACHE_MAX_ENTRIES", "20000"))
+		self.near_duplicate_threshold = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.6"))
+		self.llm_batch_size = int(os.getenv("LLM_BATCH_SIZE", "1"))
+		self.llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+		self.llm_backoff = float(os.getenv("LLM_BACKOFF", "1.0"))
+		self.llm_requests_per_minute = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+		self.llm_tokens_per_minute = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+		self.llm_prices = os.getenv("LLM_PRICES", "")
 
 		self.telegram_bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
 		self.telegram_chat_id = os.getenv("TELEGRAM_CHAT_ID")
 
 		self.linkedin_username = os.getenv("LINKEDIN_USERNAME")
 		self.linkedin_password = os.getenv("LINKEDIN_PASSWORD")
+		self.linkedin_url = os.getenv("LINKEDIN_URL", "https://www.linkedin.com")
+		self.linkedin_session_path = os.getenv("LINKEDIN_SESSION_PATH", "data/linkedin_session.json")
+		self.linkedin_stop_after_seen = int(os.getenv("LINKEDIN_STOP_AFTER_SEEN", "5"))
+		self.linkedin_max_scrolls = int(os.getenv("LINKEDIN_MAX_SCROLLS", "15"))
+		self.linkedin_tabs = int(os.getenv("LINKEDIN_TABS", "2"))
+		self.linkedin_jitter_min = float(os.getenv("LINKEDIN_JITTER_MIN", "2"))
+		self.linkedin_jitter_max = float(os.getenv("LINKEDIN_JITTER_MAX", "6"))
+
+		self.meu_padrinho_url = os.getenv("MEU_PADRINHO_URL", "https://meupadrinho.com.br")
+		self.scraper_pages = int(os.getenv("SCRAPER_PAGES", "4"))
+		self.scraper_domain_concurrency = int(os.getenv("SCRAPER_DOMAIN_CONCURRENCY", "4"))
+		self.scraper_delay = float(os.getenv("SCRAPER_DELAY", "0"))
+		self.scraper_block_resources = self._list(os.getenv("SCRAPER_BLOCK_RESOURCES", "image,media,font"))
+		self.scraper_allowed_domains = self._list(os.getenv("SCRAPER_ALLOWED_DOMAINS", ""))
+		self.scraper_use_api = os.getenv("SCRAPER_USE_API", "true").lower() == "true"
+		self.scraper_max_pages = int(os.getenv("SCRAPER_MAX_PAGES", "10"))
+		self.scraper_stop_after_seen = int(os.getenv("SCRAPER_STOP_AFTER_SEEN", "5"))
+
+		self.pipeline_llm_workers = int(os.getenv("PIPELINE_LLM_WORKERS", "3"))
+		self.pipeline_queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "10"))
+		self.metrics_textfile = os.getenv("METRICS_TEXTFILE", "")
+
+		self.daemon_meu_padrinho_interval = float(os.getenv("DAEMON_MEU_PADRINHO_INTERVAL", "30"))
+		self.daemon_linkedin_interval = float(os.getenv("DAEMON_LINKEDIN_INTERVAL", "120"))
+		self.daemon_jitter = float(os.getenv("DAEMON_JITTER", "120"))
+		self.daemon_recycle_pages = int(os.getenv("DAEMON_RECYCLE_PAGES", "500"))
+		self.daemon_recycle_memory_mb = int(os.getenv("DAEMON_RECYCLE_MEMORY_MB", "1500"))
+
+	@staticmethod
+	def _list(value):
+		return [item.strip() for item in value.split(",") if item.strip()]
+
+	# Perfil e currículo só são lidos quando algum comando precisa deles
+	@cached_property
+	def profile(self):
+		return self._load_yaml("profile.yaml")
+
+	@cached_property
+	def resume(self):
+		return self._load_text("resume.md")
+
+	@cached_property
+	def sources(self):
+		return self._load_yaml("sources.yaml")
 
 	def _load_yaml(self, filename):
+		import yaml
+
 		path = self.project_root / filename
 		if not path.exists():
 			path = self.project_root / f"{filename}.example"
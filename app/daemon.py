@@ -0,0 +1,141 @@
+import asyncio
+import os
+import random
+import signal
+import time
+from .logger import logger
+
+
+class ScheduledJob:
+	def __init__(self, name, interval_s, run, delay_s=0):
+		self.name = name
+		self.interval_s = interval_s
+		self.run = run
+		self.next_run = time.monotonic() + delay_s
+		self.runs = 0
+
+
+def process_tree_rss_mb(root_pid):
+	# Soma a memória do processo e de todos os filhos (Chromium abre vários processos)
+	children = {}
+	rss = {}
+	try:
+		pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+	except OSError:
+		return None
+
+	for pid in pids:
+		try:
+			with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+				status = dict(line.split(":", 1) for line in f if ":" in line)
+		except OSError:
+			continue
+		children.setdefault(int(status.get("PPid", "0").strip()), []).append(pid)
+		rss[pid] = int(status.get("VmRSS", "0 kB").split()[0])
+
+	total = 0
+	pending = [root_pid]
+	while pending:
+		pid = pending.pop()
+		total += rss.get(pid, 0)
+		pending.extend(children.get(pid, []))
+	return total / 1024
+
+
+class Daemon:
+	def __init__(self, launch, jobs, jitter_s=300, recycle_pages=500, recycle_memory_mb=1500):
+		self.launch = launch
+		self.jobs = jobs
+		self.jitter_s = jitter_s
+		self.recycle_pages = recycle_pages
+		self.recycle_memory_mb = recycle_memory_mb
+		self.browser = None
+		self.pages_opened = 0
+		self._contexts = {}
+		self._stop = asyncio.Event()
+
+	async def context(self, name, factory):
+		# Contextos ficam abertos entre as execuções para manter as sessões quentes
+		if name not in self._contexts:
+			if self.browser is None:
+				self.browser = await self.launch()
+				logger.info("Navegador iniciado pelo daemon")
+			context = await factory(self.browser)
+			context.on("page", self._on_page)
+			self._contexts[name] = context
+		return self._contexts[name]
+
+	def _on_page(self, page):
+		self.pages_opened += 1
+
+	def stop(self):
+		logger.info("Encerrando daemon...")
+		self._stop.set()
+
+	async def _sleep(self, seconds):
+		try:
+			await asyncio.wait_for(self._stop.wait(), timeout=max(0, seconds))
+		except asyncio.TimeoutError:
+			pass
+
+	def _needs_recycle(self):
+		if self.browser is None:
+			return False
+		if self.recycle_pages and self.pages_opened >= self.recycle_pages:
+			logger.info(f"Reciclando navegador após {self.pages_opened} páginas")
+			return True
+
+		memory_mb = process_tree_rss_mb(os.getpid())
+		if self.recycle_memory_mb and memory_mb and memory_mb >= self.recycle_memory_mb:
+			logger.info(f"Reciclando navegador: uso de memória em {memory_mb:.0f} MB")
+			return True
+		return False
+
+	async def close_browser(self):
+		for context in self._contexts.values():
+			try:
+				await context.close()
+			except Exception as e:
+				logger.debug(f"Erro ao fechar contexto: {e}")
+		self._contexts.clear()
+
+		if self.browser:
+			await self.browser.close()
+		self.browser = None
+		self.pages_opened = 0
+
+	async def run(self):
+		loop = asyncio.get_running_loop()
+		for sig in (signal.SIGTERM, signal.SIGINT):
+			try:
+				loop.add_signal_handler(sig, self.stop)
+			except (NotImplementedError, RuntimeError):
+				pass
+
+		logger.info(f"Daemon iniciado com {len(self.jobs)} tarefas agendadas")
+		try:
+			while not self._stop.is_set():
+				job = min(self.jobs, key=lambda j: j.next_run)
+				await self._sleep(job.next_run - time.monotonic())
+				if self._stop.is_set():
+					break
+
+				started = time.perf_counter()
+				logger.info(f"Executando tarefa agendada: {job.name}")
+				try:
+					await job.run(self)
+				except Exception as e:
+					logger.exception(f"Erro na tarefa agendada {job.name}: {e}")
+
+				job.runs += 1
+				jitter_s = min(self.jitter_s, job.interval_s / 2)
+				job.next_run = time.monotonic() + job.interval_s + random.uniform(-jitter_s, jitter_s)
+				logger.info(
+					f"Tarefa {job.name} finalizada em {time.perf_counter() - started:.1f}s; "
+					f"próxima em {(job.next_run - time.monotonic()) / 60:.0f} min"
+				)
+
+				if self._needs_recycle():
+					await self.close_browser()
+		finally:
+			await self.close_browser()
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from .cache import normalize_text
+from .logger import logger
+
+_PRIME = (1 << 61) - 1
+
+# Devolvido por claim(wait_s=0) quando o post parecido ainda está sendo avaliado
+PENDING = object()
+
+
+class _Claim:
+	def __init__(self, signature):
+		self.signature = signature
+		self.done = threading.Event()
+		self.evaluation = None
+
+
+class NearDuplicateIndex:
+	NUM_PERM = 64
+	BANDS = 16
+	SHINGLE_SIZE = 2
+	MIN_WORDS = 8
+	CLAIM_WAIT_S = 120
+
+	def __init__(self, db_path="data/jobs.db", threshold=0.6):
+		self.db_path = db_path
+		self.threshold = threshold
+		self._rows = self.NUM_PERM // self.BANDS
+		self._lock = threading.RLock()
+		# Posts reservados por claim() e ainda sem avaliação gravada
+		self._claims = {}
+
+		# Permutações fixas: as assinaturas precisam ser comparáveis entre execuções
+		rng = random.Random(1337)
+		self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(self.NUM_PERM)]
+
+		db_dir = os.path.dirname(self.db_path)
+		if db_dir:
+			os.makedirs(db_dir, exist_ok=True)
+
+		self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+		self._conn.execute("PRAGMA busy_timeout=30000")
+		self._init_db()
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
+
+	def _init_db(self):
+		with self._lock, self._conn:
+			self._conn.execute("""
+				CREATE TABLE IF NOT EXISTS post_signatures (
+					link TEXT PRIMARY KEY,
+					minhash BLOB,
+					evaluation JSON,
+					created_at REAL
+				)
+			""")
+			self._conn.execute("""
+				CREATE TABLE IF NOT EXISTS post_bands (
+					band INTEGER,
+					link TEXT
+				)
+			""")
+			self._conn.execute("CREATE INDEX IF NOT EXISTS idx_post_bands_band ON post_bands (band)")
+			self._conn.execute("CREATE INDEX IF NOT EXISTS idx_post_bands_link ON post_bands (link)")
+
+	def _shingles(self, text):
+		text = re.sub(r"https?://\S+|\S+@\S+|#\w+", " ", normalize_text(text))
+		tokens = re.findall(r"\w+", text)
+		if len(tokens) < self.MIN_WORDS:
+			return set()
+		return {" ".join(tokens[i:i + self.SHINGLE_SIZE]) for i in range(len(tokens) - self.SHINGLE_SIZE + 1)}
+
+	def signature(self, text):
+		shingles = self._shingles(text)
+		if not shingles:
+			return None
+
+		hashes = [
+			int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+			for s in shingles
+		]
+		return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+	def _bands(self, signature):
+		bands = []
+		for i in range(self.BANDS):
+			chunk = struct.pack(f">I{self._rows}Q", i, *signature[i * self._rows:(i + 1) * self._rows])
+			bands.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True))
+		return bands
+
+	@staticmethod
+	def similarity(sig_a, sig_b):
+		return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+	def _stored_match(self, signature, exclude=None, fingerprint=None):
+		bands = self._bands(signature)
+		placeholders = ", ".join("?" * len(bands))
+		try:
+			with self._lock:
+				rows = self._conn.execute(f"""
+					SELECT link, minhash, evaluation FROM post_signatures
+					WHERE link IN (SELECT link FROM post_bands WHERE band IN ({placeholders}))
+				""", bands).fetchall()
+		except Exception:
+			logger.exception("Erro ao consultar índice de posts duplicados")
+			return None
+
+		best = None
+		for link, blob, evaluation in rows:
+			if link == exclude:
+				continue
+			evaluation = json.loads(evaluation) if evaluation else None
+			if fingerprint and (not evaluation or evaluation.get("fingerprint") != fingerprint):
+				continue
+			score = self.similarity(signature, struct.unpack(f">{self.NUM_PERM}Q", blob))
+			if score >= self.threshold and (best is None or score > best[0]):
+				best = (score, link, evaluation)
+		return best
+
+	def find(self, text):
+		signature = self.signature(text)
+		if signature is None:
+			return None
+
+		best = self._stored_match(signature)
+		if not best:
+			return None
+
+		logger.debug(f"Post quase idêntico a {best[1]} (similaridade {best[0]:.0%})")
+		return best[1], best[2]
+
+	def claim(self, link, text, fingerprint=None, wait_s=None):
+		# Busca e reserva atômicas: um post quase idêntico avaliado em paralelo encontra a
+		# reserva e espera a avaliação dele, em vez de ser avaliado (e notificado) de novo.
+		# Sem duplicata devolve None e o chamador fica devendo add() ou release() do link
+		signature = self.signature(text)
+		if signature is None:
+			return None
+		if wait_s is None:
+			wait_s = self.CLAIM_WAIT_S
+
+		while True:
+			with self._lock:
+				best = self._stored_match(signature, exclude=link, fingerprint=fingerprint)
+				for other, claim in self._claims.items():
+					score = self.similarity(signature, claim.signature)
+					if other != link and score >= self.threshold and (best is None or score > best[0]):
+						best = (score, other, claim)
+
+				if not best:
+					self._claims[link] = _Claim(signature)
+					return None
+
+			score, original, match = best
+			if not isinstance(match, _Claim):
+				logger.debug(f"Post quase idêntico a {original} (similaridade {score:.0%})")
+				return original, match
+			if not wait_s:
+				return original, PENDING
+
+			logger.debug(f"Post quase idêntico a {original}, aguardando a avaliação dele")
+			# Se a avaliação do original falhar ou demorar demais, tenta reservar de novo
+			if match.done.wait(wait_s) and match.evaluation is not None:
+				return original, match.evaluation
+			with self._lock:
+				if self._claims.get(original) is match:
+					del self._claims[original]
+
+	def release(self, link, evaluation=None):
+		with self._lock:
+			claim = self._claims.pop(link, None)
+		if claim:
+			claim.evaluation = evaluation
+			claim.done.set()
+
+	def add(self, link, text, evaluation=None):
+		signature = self.signature(text)
+		if signature is None:
+			return
+
+		try:
+			with self._lock, self._conn:
+				self._conn.execute("DELETE FROM post_bands WHERE link = ?", (link,))
+				self._conn.execute("""
+					INSERT OR REPLACE INTO post_signatures (link, minhash, evaluation, created_at)
+					VALUES (?, ?, ?, ?)
+				""", (
+					link,
+					struct.pack(f">{self.NUM_PERM}Q", *signature),
+					json.dumps(evaluation, ensure_ascii=False) if evaluation is not None else None,
+					time.time(),
+				))
+				self._conn.executemany(
+					"INSERT INTO post_bands (band, link) VALUES (?, ?)",
+					[(band, link) for band in self._bands(signature)],
+				)
+		except Exception:
+			logger.exception(f"Erro ao gravar assinatura do post: {link}")
+		finally:
+			self.release(link, evaluation)
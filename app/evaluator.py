@@ -1,9 +1,15 @@
+import hashlib
 import json
 import os
 import re
 import requests
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .cache import normalize_text
 from .logger import logger
+from .ratelimit import RateLimiter
+from .telemetry import telemetry
 
 BASE_URL = "https://api.openai.com/v1"
 
@@ -19,6 +25,8 @@ class EvalResult:
 	notes: str
 	title: str = ""
 	company: str = ""
+	model: str = ""
+	cascade: list[dict] = field(default_factory=list)
 
 	@staticmethod
 	def from_dict(d):
@@ -31,7 +39,9 @@ class EvalResult:
 			missing_skills=d.get("missing_skills", []),
 			notes=d.get("notes", ""),
 			title=d.get("title", ""),
-			company=d.get("company", "")
+			company=d.get("company", ""),
+			model=d.get("model", ""),
+			cascade=d.get("cascade", [])
 		)
 
 	def to_dict(self):
@@ -39,10 +49,38 @@ class EvalResult:
 
 
 class Evaluator:
-	def __init__(self, api_key, model):
+	def __init__(self, api_key, model, cache=None, limiter=None, max_retries=3, backoff_s=1.0, pool_size=4,
+			escalation_model=None, escalation_band=15, escalation_min_confidence=0.6, notify_threshold=70,
+			base_url=BASE_URL):
 		self.api_key = api_key
 		self.model = model
-		self.base_url = BASE_URL
+		self.escalation_model = escalation_model
+		self.escalation_band = escalation_band
+		self.escalation_min_confidence = escalation_min_confidence
+		self.notify_threshold = notify_threshold
+		self.base_url = base_url.rstrip("/")
+		self.cache = cache
+		self.limiter = limiter or RateLimiter()
+		self.session = self._build_session(max_retries, backoff_s, pool_size)
+		self.prompt_version = self._prompt_version()
+
+	def _build_session(self, max_retries, backoff_s, pool_size):
+		# Sessão com keep-alive compartilhada pelas threads do pipeline; 429 e 5xx
+		# são repetidos com backoff exponencial, respeitando o Retry-After
+		retry = Retry(
+			total=max_retries,
+			backoff_factor=backoff_s,
+			status_forcelist=(429, 500, 502, 503, 504),
+			allowed_methods=frozenset(["GET", "POST"]),
+			respect_retry_after_header=True,
+			raise_on_status=False,
+		)
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=retry)
+
+		session = requests.Session()
+		session.mount("https://", adapter)
+		session.mount("http://", adapter)
+		return session
 
 	def _extract_json(self, text):
 		text = text.strip()
@@ -56,27 +94,35 @@ class Evaluator:
 			raise ValueError(f"Resposta sem JSON válido: {text[:500]}")
 		return json.loads(m.group(0))
 
-	def _make_request(self, system, user_prompt, timeout_s=60):
-		payload = {
-			"model": self.model,
+	def _headers(self):
+		return {
+			"Authorization": f"Bearer {self.api_key}",
+			"Content-Type": "application/json",
+		}
+
+	def _payload(self, system, user_prompt, model=None):
+		return {
+			"model": model or self.model,
 			"messages": [
 				{"role": "system", "content": system},
 				{"role": "user", "content": json.dumps(user_prompt, ensure_ascii=False)}
 			]
 		}
 
-		headers = {
-			"Authorization": f"Bearer {self.api_key}",
-			"Content-Type": "application/json",
-		}
+	def _chat(self, system, user_prompt, timeout_s=60, model=None):
+		payload = self._payload(system, user_prompt, model)
+		# Estimativa grosseira (~4 caracteres por token) até a API devolver o 'usage' real
+		estimated_tokens = len(json.dumps(payload, ensure_ascii=False)) // 4
+		self.limiter.acquire(estimated_tokens)
 
 		try:
-			r = requests.post(
-				f"{self.base_url}/chat/completions",
-				headers=headers,
-				json=payload,
-				timeout=timeout_s,
-			)
+			with telemetry.span("llm_request"):
+				r = self.session.post(
+					f"{self.base_url}/chat/completions",
+					headers=self._headers(),
+					json=payload,
+					timeout=timeout_s,
+				)
 
 			if r.status_code != 200:
 				logger.error(f"Erro da API RouteLLM (Status {r.status_code}): {r.text}")
@@ -84,11 +130,14 @@ class Evaluator:
 			r.raise_for_status()
 
 			data = r.json()
+			usage = data.get("usage") or {}
+			self.limiter.record_usage(estimated_tokens, usage.get("total_tokens"))
+			telemetry.record_usage(payload["model"], usage.get("prompt_tokens"), usage.get("completion_tokens"))
 			content = data["choices"][0]["message"]["content"]
 			result_dict = self._extract_json(content)
 			logger.debug("Resposta recebida do LLM")
 
-			return EvalResult.from_dict(result_dict)
+			return result_dict
 
 		except requests.exceptions.HTTPError as http_err:
 			body = http_err.response.text
@@ -98,9 +147,94 @@ class Evaluator:
 			logger.exception(f"Erro genérico ao avaliar vaga: {e}")
 			raise
 
+	def _make_request(self, system, user_prompt, timeout_s=60, model=None):
+		result = EvalResult.from_dict(self._chat(system, user_prompt, timeout_s, model))
+		result.model = model or self.model
+		return result
+
+	def _cached_request(self, kind, content, resume_text, profile, system, user_prompt, timeout_s, model=None):
+		model = model or self.model
+		if not self.cache:
+			return self._make_request(system, user_prompt, timeout_s, model)
+
+		key = self._cache_key(kind, content, resume_text, profile, model)
+		cached = self.cache.get(key)
+		if cached is not None:
+			logger.debug("Avaliação encontrada no cache")
+			return EvalResult.from_dict(cached)
+
+		result = self._make_request(system, user_prompt, timeout_s, model)
+		self.cache.put(key, result.to_dict(), model=model)
+		return result
+
+	def fingerprint(self, resume_text, profile):
+		# Identifica tudo que influencia a nota; avaliações gravadas com outra impressão estão desatualizadas
+		payload = json.dumps({
+			"resume": normalize_text(resume_text),
+			"profile": profile,
+			"model": self.model,
+			"escalation_model": self.escalation_model,
+			"prompt_version": self.prompt_version,
+		}, ensure_ascii=False, sort_keys=True, default=str)
+		return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+	@staticmethod
+	def _prompt_profile(profile):
+		return {
+			"target_seniority": profile.get("target_seniority", []),
+			"must_have": profile.get("must_have", []),
+			"can_have": profile.get("can_have", []),
+			"avoid": profile.get("avoid", []),
+			"notes": profile.get("notes", ""),
+		}
+
+	def _cache_key(self, kind, content, resume_text, profile, model=None):
+		# Só o que entra no prompt: mudar o pré-filtro ou o limite de notificação não invalida o cache
+		prompt_profile = dict(self._prompt_profile(profile), language=profile.get("language", "pt-BR"))
+		return self.cache.make_key(kind, content, resume_text, prompt_profile, model or self.model, self.prompt_version)
+
+	def _prompt_version(self):
+		# Os prompts são montados com entradas vazias: qualquer mudança no texto deles muda o hash,
+		# invalidando o cache e as avaliações gravadas sem depender de incrementar uma versão à mão
+		empty = {"title": "", "company": "", "description": "", "text": ""}
+		prompts = [self._prompt(kind, empty, "", {})[:2] for kind in ("job", "linkedin_post")]
+		prompts.append(self._batch_prompt(prompts[:1]))
+		payload = json.dumps(prompts, ensure_ascii=False, sort_keys=True)
+		return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+	def _should_escalate(self, result):
+		if not self.escalation_model or self.escalation_model == result.model:
+			return False
+		borderline = abs(result.score - self.notify_threshold) <= self.escalation_band
+		return borderline or result.confidence < self.escalation_min_confidence
+
+	def _cascade(self, kind, content, resume_text, profile, system, user_prompt, timeout_s, first):
+		# O modelo barato decide os casos claros; só os próximos do corte vão para o modelo maior
+		if not self._should_escalate(first):
+			return first
+
+		logger.debug(
+			f"Score {first.score} (confiança {first.confidence}) perto do corte. "
+			f"Reavaliando com {self.escalation_model}"
+		)
+		second = self._cached_request(kind, content, resume_text, profile, system, user_prompt, timeout_s, self.escalation_model)
+		second.cascade = [
+			{k: v for k, v in first.to_dict().items() if k != "cascade"},
+			{k: v for k, v in second.to_dict().items() if k != "cascade"},
+		]
+		return second
+
+	def _evaluate_kind(self, kind, content, resume_text, profile, system, user_prompt, timeout_s):
+		first = self._cached_request(kind, content, resume_text, profile, system, user_prompt, timeout_s)
+		return self._cascade(kind, content, resume_text, profile, system, user_prompt, timeout_s, first)
+
 	def evaluate(self, job_data, resume_text, profile, timeout_s=60):
 		logger.debug(f"Enviando requisição para LLM (modelo: {self.model})")
 
+		system, user_prompt, content = self._job_prompt(job_data, resume_text, profile)
+		return self._evaluate_kind("job", content, resume_text, profile, system, user_prompt, timeout_s)
+
+	def _job_prompt(self, job_data, resume_text, profile):
 		language = profile.get("language", "pt-BR")
 
 		system = (
@@ -114,13 +248,7 @@ class Evaluator:
 		user_prompt = {
 			"candidate": {
 				"resume": resume_text,
-				"profile": {
-					"target_seniority": profile.get("target_seniority", []),
-					"must_have": profile.get("must_have", []),
-					"can_have": profile.get("can_have", []),
-					"avoid": profile.get("avoid", []),
-					"notes": profile.get("notes", ""),
-				}
+				"profile": self._prompt_profile(profile)
 			},
 			"job": {
 				"title": job_data.get("title", ""),
@@ -148,11 +276,20 @@ class Evaluator:
 			}
 		}
 
-		return self._make_request(system, user_prompt, timeout_s)
+		content = "\n".join([
+			job_data.get("title", "") or "",
+			job_data.get("company", "") or "",
+			job_data.get("description", "") or "",
+		])
+		return system, user_prompt, content
 
 	def evaluate_linkedin_post(self, post, resume_text, profile, timeout_s=60):
 		logger.debug(f"Enviando requisição para LLM (modelo: {self.model})")
 
+		system, user_prompt, content = self._linkedin_prompt(post, resume_text, profile)
+		return self._evaluate_kind("linkedin_post", content, resume_text, profile, system, user_prompt, timeout_s)
+
+	def _linkedin_prompt(self, post, resume_text, profile):
 		language = profile.get("language", "pt-BR")
 
 		system = (
@@ -171,13 +308,7 @@ class Evaluator:
 		user_prompt = {
 			"candidate": {
 				"resume": resume_text,
-				"profile": {
-					"target_seniority": profile.get("target_seniority", []),
-					"must_have": profile.get("must_have", []),
-					"can_have": profile.get("can_have", []),
-					"avoid": profile.get("avoid", []),
-					"notes": profile.get("notes", ""),
-				}
+				"profile": self._prompt_profile(profile)
 			},
 			"job": {
 				"post_text": post.get("text", "")
@@ -206,4 +337,175 @@ class Evaluator:
 			}
 		}
 
-		return self._make_request(system, user_prompt, timeout_s)
\ No newline at end of file
+		return system, user_prompt, post.get("text", "")
+
+	def _prompt(self, kind, item, resume_text, profile):
+		if kind == "linkedin_post":
+			return self._linkedin_prompt(item, resume_text, profile)
+		return self._job_prompt(item, resume_text, profile)
+
+	@staticmethod
+	def _valid_entry(entry):
+		if not isinstance(entry, dict):
+			return False
+		try:
+			score = float(entry["score"])
+		except (KeyError, TypeError, ValueError):
+			return False
+		return 0 <= score <= 100 and entry.get("decision") in ("apply", "skip")
+
+	def _batch_prompt(self, prompts):
+		system, user_prompt = prompts[0]
+		system += (
+			" Você receberá várias vagas de uma vez em 'jobs'. Avalie cada uma de forma independente "
+			"e responda com um objeto JSON com a chave 'results', contendo uma avaliação por vaga com o mesmo 'id'."
+		)
+		batch_prompt = {
+			"candidate": user_prompt["candidate"],
+			"jobs": [{"id": str(i), **prompt["job"]} for i, (_, prompt) in enumerate(prompts)],
+			"instructions": user_prompt["instructions"],
+			"output_format": {
+				"results": [{"id": "string (o mesmo 'id' da vaga em 'jobs')", **user_prompt["output_format"]}]
+			},
+		}
+		return system, batch_prompt
+
+	def evaluate_batch(self, items, resume_text, profile, kind="job", timeout_s=120):
+		results = [None] * len(items)
+		prompts = [self._prompt(kind, item, resume_text, profile) for item in items]
+		pending = []
+
+		for i, (system, user_prompt, content) in enumerate(prompts):
+			key = None
+			if self.cache:
+				key = self._cache_key(kind, content, resume_text, profile)
+				cached = self.cache.get(key)
+				if cached is not None:
+					results[i] = EvalResult.from_dict(cached)
+					continue
+			pending.append((i, system, user_prompt, key))
+
+		if len(pending) > 1:
+			logger.debug(f"Enviando lote de {len(pending)} vagas para o LLM (modelo: {self.model})")
+			system, batch_prompt = self._batch_prompt([(p[1], p[2]) for p in pending])
+			try:
+				response = self._chat(system, batch_prompt, timeout_s)
+				entries = {str(e.get("id")): e for e in response.get("results", []) if isinstance(e, dict)}
+			except Exception:
+				logger.warning("Falha na avaliação em lote. Avaliando vaga por vaga.")
+				entries = {}
+
+			for n, (i, _, _, key) in enumerate(pending):
+				entry = entries.get(str(n))
+				if self._valid_entry(entry):
+					results[i] = EvalResult.from_dict(entry)
+					results[i].model = self.model
+					if key:
+						self.cache.put(key, results[i].to_dict(), model=self.model)
+
+		# Itens ausentes ou malformados na resposta do lote são reavaliados individualmente;
+		# um item que falha fica como None sem descartar os que já foram avaliados
+		for i, system, user_prompt, key in pending:
+			if results[i] is not None:
+				continue
+			logger.debug(f"Avaliando individualmente item {i} do lote")
+			try:
+				results[i] = self._make_request(system, user_prompt, timeout_s)
+			except Exception as e:
+				logger.exception(f"Erro ao avaliar item {i} do lote: {e}")
+				continue
+			if key:
+				self.cache.put(key, results[i].to_dict(), model=self.model)
+
+		for i, (system, user_prompt, content) in enumerate(prompts):
+			if results[i] is None:
+				continue
+			try:
+				results[i] = self._cascade(kind, content, resume_text, profile, system, user_prompt, timeout_s, results[i])
+			except Exception as e:
+				logger.warning(f"Falha ao reavaliar item {i} com o modelo maior; mantendo a primeira avaliação: {e}")
+
+		return results
+
+	def write_batch_file(self, entries, resume_text, profile, path):
+		# entries: pares (kind, item); o link do item volta como custom_id no resultado
+		count = 0
+		with open(path, "w", encoding="utf-8") as f:
+			for kind, item in entries:
+				system, user_prompt, _ = self._prompt(kind, item, resume_text, profile)
+				request = {
+					"custom_id": item["link"],
+					"method": "POST",
+					"url": "/v1/chat/completions",
+					"body": self._payload(system, user_prompt),
+				}
+				f.write(json.dumps(request, ensure_ascii=False) + "\n")
+				count += 1
+
+		logger.info(f"Arquivo de lote gerado com {count} vagas: {path}")
+		return count
+
+	def submit_batch(self, path, timeout_s=120):
+		with open(path, "rb") as f:
+			r = self.session.post(
+				f"{self.base_url}/files",
+				headers={"Authorization": f"Bearer {self.api_key}"},
+				files={"file": f},
+				data={"purpose": "batch"},
+				timeout=timeout_s,
+			)
+		r.raise_for_status()
+		file_id = r.json()["id"]
+
+		r = self.session.post(
+			f"{self.base_url}/batches",
+			headers=self._headers(),
+			json={"input_file_id": file_id, "endpoint": "/v1/chat/completions", "completion_window": "24h"},
+			timeout=timeout_s,
+		)
+		r.raise_for_status()
+		batch_id = r.json()["id"]
+
+		logger.info(f"Lote enviado para processamento assíncrono: {batch_id}")
+		return batch_id
+
+	def collect_batch(self, batch_id, timeout_s=120):
+		r = self.session.get(f"{self.base_url}/batches/{batch_id}", headers=self._headers(), timeout=timeout_s)
+		r.raise_for_status()
+		batch = r.json()
+
+		if batch.get("status") in ("failed", "expired", "cancelled"):
+			logger.warning(f"Lote {batch_id} terminou sem resultados (status: {batch.get('status')})")
+			return {}
+
+		if batch.get("status") != "completed":
+			logger.info(f"Lote {batch_id} ainda não foi concluído (status: {batch.get('status')})")
+			return None
+
+		r = self.session.get(
+			f"{self.base_url}/files/{batch['output_file_id']}/content",
+			headers=self._headers(),
+			timeout=timeout_s,
+		)
+		r.raise_for_status()
+
+		results = {}
+		for line in r.text.splitlines():
+			if not line.strip():
+				continue
+			entry = json.loads(line)
+			try:
+				content = entry["response"]["body"]["choices"][0]["message"]["content"]
+				data = self._extract_json(content)
+			except Exception as e:
+				logger.warning(f"Resultado inválido no lote para {entry.get('custom_id')}: {e}")
+				continue
+
+			if self._valid_entry(data):
+				results[entry["custom_id"]] = EvalResult.from_dict(data)
+				results[entry["custom_id"]].model = self.model
+			else:
+				logger.warning(f"Avaliação malformada no lote para {entry.get('custom_id')}")
+
+		logger.info(f"Lote {batch_id}: {len(results)} avaliações coletadas")
+		return results
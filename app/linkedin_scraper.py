@@ -1,91 +1,267 @@
+from .browser import PagePool
 from .logger import logger
+from .telemetry import telemetry
 from .config import config
 from urllib.parse import quote
-import time
+import asyncio
+import os
+import random
+
+_DONE = object()
+
+# Extrai URN e texto de todos os posts numa única chamada ao navegador
+EXTRACT_POSTS_JS = """
+([postSelector, textSelector, start]) => Array.from(document.querySelectorAll(postSelector)).slice(start).map(el => {
+	const text = el.querySelector(textSelector);
+	return { urn: el.getAttribute("data-urn"), text: text ? text.innerText : null };
+})
+"""
 
 class LinkedinScraper:
-	def __init__(self, page, queries):
+	POST_SELECTOR = "div.feed-shared-update-v2"
+	TEXT_SELECTOR = ".update-components-update-v2__commentary span.break-words span[dir='ltr']"
+	SCROLL_TIMEOUT_MS = 10000
+
+	def __init__(self, page, queries, storage=None, session_path=None, stop_after_seen=5, max_scrolls=15,
+			tabs=1, jitter_s=(2.0, 6.0), base_url="https://www.linkedin.com"):
 		self.page = page
+		self.base_url = base_url.rstrip("/")
+		self.storage = storage
+		self.session_path = session_path
+		self.stop_after_seen = stop_after_seen
+		self.max_scrolls = max_scrolls
+		self.tabs = max(1, tabs)
+		self.jitter_s = jitter_s
 		self.username = config.linkedin_username
 		self.password = config.linkedin_password
 		self.queries = queries
+		self._pending_watermarks = {}
 
 	def _generate_search_url(self, query):
-		base_url = "https://www.linkedin.com/search/results/content/"
+		base_url = f"{self.base_url}/search/results/content/"
 		query_encoded = quote(query)
 		url = f"{base_url}?keywords={query_encoded}&origin=FACETED_SEARCH&sid=Kb%2C&sortBy=%22date_posted%22"
 
 		return url
 
-	def get_job_posts(self):
+	def _post_link(self, urn):
+		return f"{self.base_url}/feed/update/{urn}"
+
+	async def _extract_posts(self, page, start=0):
+		return await page.evaluate(EXTRACT_POSTS_JS, [self.POST_SELECTOR, self.TEXT_SELECTOR, start])
+
+	async def _scroll_for_more(self, page, count, timeout_ms=None):
+		# Espera o DOM crescer em vez de dormir um tempo fixo
+		await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+		try:
+			await page.wait_for_function(
+				"([selector, count]) => document.querySelectorAll(selector).length > count",
+				arg=[self.POST_SELECTOR, count],
+				timeout=timeout_ms or self.SCROLL_TIMEOUT_MS,
+			)
+			return True
+		except Exception:
+			return False
+
+	async def _scan_query(self, page, query, index):
+		complete_link = self._generate_search_url(query)
+		await page.goto(complete_link)
+		await page.wait_for_selector("div.search-results-container")
+		await page.screenshot(path=f"data/screenshots/{index}_{query}.png")
+
+		# Resultados vêm ordenados por data: ao chegar no post mais novo da execução
+		# anterior, ou numa sequência de posts já vistos, o resto já foi coletado
+		watermark = self.storage.get_watermark("linkedin", query) if self.storage else None
+		newest_urn = None
+		seen_streak = 0
+		processed = 0
+		yielded = []
+
+		for _ in range(self.max_scrolls + 1):
+			posts = await self._extract_posts(page, processed)
+			processed += len(posts)
+			# Uma consulta por lote extraído em vez de uma por post
+			unvisited = set(self.storage.filter_unvisited(
+				[self._post_link(post["urn"]) for post in posts if post["urn"]]
+			)) if self.storage else None
+
+			for post in posts:
+				urn = post["urn"]
+
+				if not urn:
+					logger.error("Erro ao extrair urn do post")
+					continue
+
+				newest_urn = newest_urn or urn
+				if urn == watermark:
+					logger.debug(f"Marca d'água alcançada na busca: {query}")
+					seen_streak = self.stop_after_seen
+					break
+
+				link = self._post_link(urn)
+				# Posts sem texto (compartilhamentos, imagens) nunca são gravados: não contam
+				# como novos nem como vistos, senão zerariam a sequência de já vistos
+				if not post["text"]:
+					logger.debug(f"Post sem texto. Pulando: {link}")
+					continue
+
+				if unvisited is not None and link not in unvisited:
+					seen_streak += 1
+					if seen_streak >= self.stop_after_seen:
+						break
+					continue
+
+				seen_streak = 0
+
+				yielded.append(link)
+				yield {
+					"link": link,
+					"text": post["text"]
+				}
+
+			if seen_streak >= self.stop_after_seen:
+				logger.debug(f"{seen_streak} posts seguidos já vistos. Parando a rolagem da busca: {query}")
+				break
+
+			if not await self._scroll_for_more(page, processed):
+				logger.debug(f"Fim dos resultados da busca: {query}")
+				break
+
+		if newest_urn:
+			self._pending_watermarks[query] = (newest_urn, yielded)
+
+	def commit_watermarks(self):
+		# Chamado depois que o pipeline gravou os posts: a marca d'água só avança se todos
+		# os posts da busca foram salvos; um post que falhou é buscado de novo na próxima execução
+		if not self.storage:
+			return
+
+		for query, (newest_urn, links) in self._pending_watermarks.items():
+			missing = self.storage.filter_unvisited(links)
+			if missing:
+				logger.info(f"{len(missing)} posts não gravados; marca d'água mantida na busca: {query}")
+				continue
+			self.storage.set_watermark("linkedin", query, newest_urn)
+		self._pending_watermarks.clear()
+
+	async def get_job_posts(self):
+		return [post async for post in self.iter_job_posts()]
+
+	async def _has_valid_session(self):
+		cookies = await self.page.context.cookies(self.base_url)
+		if not any(c["name"] == "li_at" for c in cookies):
+			return False
+
+		# Sessão expirada redireciona o feed para login/authwall/checkpoint
+		try:
+			await self.page.goto(f"{self.base_url}/feed/", wait_until="domcontentloaded")
+		except Exception as e:
+			logger.debug(f"Erro ao validar sessão do Linkedin: {e}")
+			return False
+
+		return not any(part in self.page.url for part in ("/login", "/authwall", "/checkpoint", "/uas/"))
+
+	async def _save_session(self):
+		if not self.session_path:
+			return
+
+		session_dir = os.path.dirname(self.session_path)
+		if session_dir:
+			os.makedirs(session_dir, exist_ok=True)
+
+		await self.page.context.storage_state(path=self.session_path)
+		logger.debug(f"Sessão do Linkedin salva em {self.session_path}")
+
+	async def _ensure_logged_in(self):
+		if await self._has_valid_session():
+			logger.info("Reaproveitando sessão salva do Linkedin")
+			# Regrava para manter os cookies renovados pelo Linkedin
+			await self._save_session()
+			return True
+
 		logger.debug("Fazendo login no Linkedin...")
 		try:
-			self.page.goto("https://www.linkedin.com/login")
-			time.sleep(5)
-			self.page.screenshot(path="data/screenshots/linkedin_login.png")
-			self.page.wait_for_selector("input#username")
-			self.page.locator("#username").fill(self.username)
-			self.page.locator("#password").fill(self.password)
+			await self.page.goto(f"{self.base_url}/login")
+			await asyncio.sleep(5)
+			await self.page.screenshot(path="data/screenshots/linkedin_login.png")
+			await self.page.wait_for_selector("input#username")
+			await self.page.locator("#username").fill(self.username)
+			await self.page.locator("#password").fill(self.password)
 
 			try:
-				self.page.locator("label[for='rememberMeOptIn-checkbox']").click()
+				await self.page.locator("label[for='rememberMeOptIn-checkbox']").click()
 			except:
 				pass
 
-			time.sleep(2)
-			self.page.locator("button.btn__primary--large.from__button--floating").click()
+			await asyncio.sleep(2)
+			await self.page.locator("button.btn__primary--large.from__button--floating").click()
 		except Exception as e:
 			logger.error(f"Erro ao fazer login no Linkedin: {e}")
-			return []
-
-		all_job_posts = []
+			return False
 
-		for i, query in enumerate(self.queries):
-			logger.info(f"Fazendo busca no Linkedin (query: {query})...")
-			time.sleep(5)
-			try:
-				complete_link = self._generate_search_url(query)
-				self.page.goto(complete_link)
-				self.page.wait_for_selector("div.search-results-container")
-				self.page.screenshot(path=f"data/screenshots/{i}_{query}.png")
-				results_container = self.page.locator("div.search-results-container")
-
-				for _ in range(3):
-					self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-					self.page.wait_for_timeout(2000)
+		try:
+			await self.page.wait_for_url("**/feed/**", timeout=30000)
+			await self._save_session()
+		except Exception as e:
+			# Desafio de segurança ou redirecionamento inesperado: segue sem salvar a sessão
+			logger.warning(f"Login no Linkedin não chegou ao feed; sessão não foi salva: {e}")
 
-				job_posts = self.page.locator("div.feed-shared-update-v2")
+		return True
 
-				for i in range(job_posts.count()):
-					job_post = job_posts.nth(i)
-					urn = job_post.get_attribute("data-urn")
+	async def _query_worker(self, pool, queries, results):
+		while True:
+			try:
+				index, query = queries.get_nowait()
+			except asyncio.QueueEmpty:
+				return
 
-					if not urn:
-						logger.error("Erro ao extrair urn do post")
-						continue
+			# Intervalo aleatório por aba para não disparar buscas em rajada
+			await asyncio.sleep(random.uniform(*self.jitter_s))
+			logger.info(f"Fazendo busca no Linkedin (query: {query})...")
+			try:
+				async with pool.page() as page:
+					with telemetry.span("linkedin_query"):
+						async for post in self._scan_query(page, query, index):
+							await results.put(post)
+			except Exception as e:
+				logger.error(f"Erro ao fazer busca no Linkedin (query: {query}): {e}")
 
-					link = f"https://www.linkedin.com/feed/update/{urn}"
+	async def _finish_workers(self, workers, results):
+		await asyncio.gather(*workers, return_exceptions=True)
+		await results.put(_DONE)
 
-					text_locator = job_post.locator(".update-components-update-v2__commentary span.break-words span[dir='ltr']").first
-					if text_locator.count() == 0:
-						logger.debug(f"Post sem texto. Pulando: {link}")
-						continue
+	async def iter_job_posts(self):
+		if not await self._ensure_logged_in():
+			await self.page.close()
+			return
 
-					try:
-						post_text = text_locator.inner_text(timeout=5000)
-					except Exception as e:
-						logger.debug(f"Erro ao extrair texto do post {link}: {e}")
-						continue
+		# As abas compartilham o contexto já autenticado
+		queries = asyncio.Queue()
+		for index, query in enumerate(self.queries):
+			queries.put_nowait((index, query))
 
-					post = {
-						"link": link,
-						"text": post_text
-					}
-					all_job_posts.append(post)
+		results = asyncio.Queue(maxsize=50)
+		pool = PagePool(self.page.context, size=self.tabs)
+		workers = [
+			asyncio.create_task(self._query_worker(pool, queries, results))
+			for _ in range(min(self.tabs, len(self.queries)))
+		]
+		finisher = asyncio.create_task(self._finish_workers(workers, results))
 
-			except Exception as e:
-				logger.error(f"Erro ao fazer busca no Linkedin: {e}")
-				return []
+		seen = set()
+		try:
+			while True:
+				post = await results.get()
+				if post is _DONE:
+					break
 
-		self.page.close()
-		return all_job_posts
+				# O mesmo post pode aparecer em várias buscas
+				if post["link"] in seen:
+					continue
+				seen.add(post["link"])
+				yield post
+		finally:
+			for task in workers + [finisher]:
+				task.cancel()
+			await pool.close()
+			await self.page.close()
@@ -6,7 +6,6 @@ from datetime import datetime
 class Logger:
     def __init__(self, name="job_scout", log_dir="logs", level=logging.INFO):
         self.log_dir = Path(log_dir)
-        self.log_dir.mkdir(exist_ok=True)
 
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
@@ -22,14 +21,25 @@ class Logger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
         self.logger.addHandler(console_handler)
+        self.formatter = formatter
+        self.log_file = None
+
+    def enable_file(self):
+        # Só as execuções do pipeline gravam arquivo; comandos de consulta ficam só no console
+        if self.log_file:
+            return
 
+        self.log_dir.mkdir(exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = self.log_dir / f"run_{timestamp}.log"
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
-        file_handler.setFormatter(formatter)
+        self.log_file = self.log_dir / f"run_{timestamp}.log"
+        file_handler = logging.FileHandler(self.log_file, encoding="utf-8")
+        file_handler.setFormatter(self.formatter)
         self.logger.addHandler(file_handler)
 
-        self.logger.info(f"Logger inicializado. Arquivo: {log_file}")
+        self.logger.info(f"Logger inicializado. Arquivo: {self.log_file}")
+
+    def set_level(self, level):
+        self.logger.setLevel(level)
 
     def info(self, message):
         self.logger.info(message)
@@ -1,140 +1,264 @@
 import argparse
-from patchright.sync_api import sync_playwright
-from app import Storage, Scraper, config, Evaluator, get_notifier, logger, LinkedinScraper
 import json
+import sys
 import time
 
-def run_linkedin(browser, queries=['("vue" OR "vue.js") AND (frontend OR front-end OR front end) AND vaga']):
-	context = browser.new_context(
-		viewport={'width': 1920, 'height': 1080}
-	)
-	logger.info("Iniciando busca no Linkedin...")
-	linkedin_scraper = LinkedinScraper(context.new_page(), queries)
-	linkedin_posts = linkedin_scraper.get_job_posts()
-
-	for post in linkedin_posts:
-		if db.is_visited(post["link"]):
-			continue
-
-		score_result = evaluator.evaluate_linkedin_post(post, config.resume, config.profile)
-		logger.info(f"Score: {score_result.score}/100 | Decisão: {score_result.decision}")
-
-		job_data = {
-			"title": score_result.title,
-			"company": score_result.company,
-			"link": post["link"],
-			"subscription_link": post["link"],
-		}
-
-		if score_result.score >= config.min_score:
-			notifier.notify_job(job_data, score_result)
+COMMANDS = ("run", "list", "search", "show", "stats", "rescore", "compact")
+GLOBAL_FLAGS = ("--timing", "-v", "--verbose")
+
+
+def open_storage(query_only=False):
+	import os
+	from app.config import config
+	from app.storage import Storage
+
+	# Sem banco ainda, a abertura normal cria um vazio em vez de falhar
+	query_only = query_only and os.path.exists(config.db_path)
+	return Storage(db_path=config.db_path, compress_min_bytes=config.storage_compress_min_bytes, query_only=query_only)
+
+
+def check_llm_config():
+	from app.config import config
+	from app.logger import logger
+
+	if not config.api_key:
+	  logger.error("Faltando API_KEY")
+	  return False
+
+	if not config.resume:
+	  logger.error("Faltando currículo")
+	  return False
+
+	return True
+
+
+def cmd_run(args):
+	import asyncio
+	from app.logger import logger
+
+	logger.enable_file()
+	logger.info("=== Iniciando Job Scout ===")
+
+	if not check_llm_config():
+		return 1
+
+	from app import runner
+
+	runner.setup(dry_run_mode=args.dry_run)
+	if args.daemon:
+		asyncio.run(runner.run_daemon(force=args.force))
+	else:
+		asyncio.run(runner.run(backfill=args.backfill, force=args.force))
+
+
+def cmd_list(args):
+	db = open_storage(query_only=True)
+	try:
+		jobs, next_cursor = db.query_jobs(
+			text=getattr(args, "text", None),
+			source=args.source,
+			min_score=args.min_score,
+			decision=args.decision,
+			since=args.since,
+			order=args.order,
+			limit=args.limit,
+			cursor=args.cursor,
+		)
+	except ValueError as e:
+		print(e, file=sys.stderr)
+		return 1
+	finally:
+		db.close()
+
+	for job in jobs:
+		score = "-" if job["evaluation_score"] is None else f"{job['evaluation_score']:.0f}"
+		title = job["title"] or "(sem título)"
+		company = f" @ {job['company']}" if job["company"] else ""
+		print(f"{score:>3}  {job['decision'] or '-':<6}  {job['source']:<12}  {title}{company}  {job['link']}")
+
+	if next_cursor:
+		print(f"Próxima página: --cursor {next_cursor}", file=sys.stderr)
+
+
+def cmd_show(args):
+	db = open_storage(query_only=True)
+	job = db.get_job(args.link)
+	db.close()
+
+	if not job:
+		print(f"Vaga não encontrada: {args.link}", file=sys.stderr)
+		return 1
+
+	print(json.dumps(job, ensure_ascii=False, indent=2))
+
+
+def cmd_stats(args):
+	db = open_storage(query_only=True)
+	stats = db.stats()
+	db.close()
+
+	if args.json:
+		print(json.dumps(stats, ensure_ascii=False, indent=2))
+		return
+
+	print(f"Vagas: {stats['total']} ({stats['db_size_bytes'] / 1024 / 1024:.1f} MB)")
+	for row in stats["sources"]:
+		avg = "-" if row["avg_score"] is None else f"{row['avg_score']:.1f}"
+		print(f"  {row['source']:<12} {row['jobs']:>6} vagas | score médio {avg} | última em {row['last_visited_at']}")
+	print("Decisões: " + ", ".join(f"{decision}={count}" for decision, count in stats["decisions"].items()))
+	print(f"Arquivadas: {stats['archived']}")
+
+	if args.runs:
+		from app.config import config
+		from app.telemetry import telemetry
+
+		# Só aponta para o banco: configure() criaria as tabelas, e consultas não gravam nada
+		telemetry.db_path = config.db_path
+		print(f"\nÚltimas {args.runs} execuções:")
+		for run in telemetry.recent_runs(args.runs):
+			print(
+				f"  #{run['id']} {run['started_at'][:19]} {run['command']:<22} {run['duration_s']:>7.1f}s "
+				f"{run['evaluated']:>4} avaliadas {run['failed']:>3} falhas "
+				f"{run['prompt_tokens'] + run['completion_tokens']:>8} tokens US$ {run['cost_usd']:.4f}"
+			)
+		for stage, s in sorted(telemetry.rolling_stages().items()):
+			print(f"  {stage:<16} p50 {s['p50_ms']:>8.0f} ms  p95 {s['p95_ms']:>8.0f} ms (móvel)")
+
+
+def cmd_rescore(args):
+	import asyncio
+	from app.logger import logger
+
+	logger.enable_file()
+	if not check_llm_config():
+		return 1
+
+	from app import runner
+
+	if args.batch:
+		runner.setup()
+		batch_id = runner.submit_rescore_batch(source=args.source, limit=args.limit)
+		if batch_id:
+			logger.info(f"Lote {batch_id} enviado; colete com: python -m app.main rescore --collect")
 		else:
-			logger.debug(f"Score abaixo do mínimo ({config.min_score})")
-
-		job_data["evaluation"] = score_result.to_dict()
-		db.save_job(job_data, "linkedin")
-
-	logger.info("Busca no Linkedin finalizada")
-
-def run_meu_padrinho(browser):
-	JOB_FILTERS = {
-		"termoBusca": "",
-		"cargos": ["frontend"],
-		"formasTrabalho": [],
-		"niveis": [],
-		"plataformas": [],
-		"vagaEasyApply": False,
-		"vagaVerificadaPorIa": False,
-		"tiposContratacao": [],
-		"apenasComRecrutador": False,
-		"comEmailDeContato": False,
-	}
-
-	storage_state = {
-		"cookies": [],
-		"origins": [{
-			"origin": "https://meupadrinho.com.br",
-			"localStorage": [{
-				"name": "job_filters",
-				"value": json.dumps(JOB_FILTERS, ensure_ascii=False)
-			}]
-		}]
-	}
-
-	context = browser.new_context(storage_state=storage_state)
-	scraper = Scraper(context)
-	links = scraper.get_job_links()
-
-	if not links:
-		logger.warning("Nenhuma vaga encontrada nesta execução")
+			logger.info("Nenhuma vaga pendente para enviar em lote")
+		runner.close()
 		return
 
-	for link in links:
-		if db.is_visited(link):
-			continue
+	if args.collect is not None:
+		runner.setup()
+		saved = runner.collect_rescore_batches(args.collect or None)
+		logger.info(f"Coleta finalizada: {saved} vagas atualizadas")
+		runner.close()
+		return
 
-		logger.info(f"Analisando vaga: {link}")
+	runner.setup(dry_run_mode=args.dry_run)
+	stats = asyncio.run(runner.rescore(source=args.source, limit=args.limit, workers=args.workers))
+	logger.info(f"Reavaliação finalizada: {stats['evaluated']} vagas reavaliadas, {stats['failed']} falhas")
 
-		try:
-			job_data = scraper.get_job_details(link)
-			logger.info(f"Título: {job_data['title']}")
 
-			score_result = evaluator.evaluate(job_data, config.resume, config.profile)
-			logger.info(f"Score: {score_result.score}/100 | Decisão: {score_result.decision}")
+def add_query_arguments(parser):
+	parser.add_argument("--source", help="meu-padrinho ou linkedin")
+	parser.add_argument("--min-score", type=float)
+	parser.add_argument("--decision", help="apply, maybe ou skip")
+	parser.add_argument("--since", help="Data ISO mínima de visita (ex: 2025-01-31)")
+	parser.add_argument("--order", choices=["recent", "score"], default="recent", help="Mais recentes ou maior score primeiro")
+	parser.add_argument("--limit", type=int, default=20)
+	parser.add_argument("--cursor", help="Continua a listagem a partir da página anterior")
+	parser.set_defaults(func=cmd_list)
 
-			if score_result.score >= config.min_score:
-				notifier.notify_job(job_data, score_result)
-			else:
-				logger.debug(f"Score abaixo do mínimo ({config.min_score})")
 
-			job_data["evaluation"] = score_result.to_dict()
-			db.save_job(job_data, "meu-padrinho")
-		except Exception as e:
-			logger.exception(f"Erro ao analisar vaga: {e}")
+def cmd_compact(args):
+	from app.config import config
 
-		time.sleep(10)
+	db = open_storage()
+	stats = db.compact(
+		retention_days=config.retention_days if args.days is None else args.days,
+		min_score=config.retention_min_score if args.min_score is None else args.min_score,
+	)
+	db.close()
+
+	if stats is None:
+		return 1
+	print(
+		f"{stats['archived']} vagas arquivadas, {stats['compressed']} comprimidas, "
+		f"{stats['size_before_bytes'] / 1024 / 1024:.1f} MB -> {stats['size_after_bytes'] / 1024 / 1024:.1f} MB"
+	)
 
-	logger.info("Fechando navegador da busca MP...")
 
-def main():
+def build_parser():
 	parser = argparse.ArgumentParser(description="Job Matcher - Meu Padrinho")
-	parser.add_argument("--dry-run", action="store_true", help="Não notifica, só mostra resultados")
-	parser.add_argument("--force", action="store_true", help="Reavalia vagas já vistas")
-	args = parser.parse_args()
+	parser.add_argument("--timing", action="store_true", help="Mostra o tempo de inicialização e execução do comando")
+	parser.add_argument("-v", "--verbose", action="store_true", help="Mostra os logs dos comandos de consulta")
+	commands = parser.add_subparsers(dest="command")
 
-	logger.info("=== Iniciando Job Scout ===")
+	run = commands.add_parser("run", help="Busca, avalia e notifica vagas (padrão)")
+	run.add_argument("--dry-run", action="store_true", help="Não notifica nem grava, só mostra resultados")
+	run.add_argument("--force", action="store_true", help="Antes da busca, reavalia as vagas salvas com currículo, perfil ou prompt desatualizados")
+	run.add_argument("--daemon", action="store_true", help="Fica em execução com o navegador aberto, agendando cada fonte no seu intervalo")
+	run.add_argument("--backfill", action="store_true", help="Percorre toda a listagem do Meu Padrinho, ignorando a marca d'água")
+	run.set_defaults(func=cmd_run)
 
-	if not config.api_key:
-	  logger.error("Faltando API_KEY")
-	  return
+	add_query_arguments(commands.add_parser("list", help="Lista as vagas salvas"))
 
-	if not config.resume:
-	  logger.error("Faltando currículo")
-	  return
+	search = commands.add_parser("search", help="Busca por texto no título, empresa e descrição das vagas salvas")
+	search.add_argument("text", help='Termos da busca (ex: "nuxt remoto")')
+	add_query_arguments(search)
 
-	with sync_playwright() as p:
-		browser = p.chromium.launch()
+	show = commands.add_parser("show", help="Mostra uma vaga salva com a avaliação completa")
+	show.add_argument("link")
+	show.set_defaults(func=cmd_show)
 
-		run_meu_padrinho(browser)
+	stats = commands.add_parser("stats", help="Resumo das vagas salvas")
+	stats.add_argument("--json", action="store_true")
+	stats.add_argument("--runs", type=int, default=0, help="Mostra a telemetria das últimas N execuções")
+	stats.set_defaults(func=cmd_stats)
 
-		if config.environment == "dev":
-			queries = [
-				'("vue" OR "vue.js" OR vuejs) AND vaga',
-				'("frontend" OR "front end" OR "front-end") AND vaga',
-				'("vue" OR "vue.js" OR vuejs) AND latam',
-				'(vue OR vue.js OR vuejs) AND "remote" AND brazil',
-				'(vue OR vue.js OR vuejs) AND "remote" AND latam',
-				'(vue OR vue.js OR vuejs) AND "remote"',
-			]
-			run_linkedin(browser, queries)
+	rescore = commands.add_parser("rescore", help="Reavalia as vagas salvas com avaliação desatualizada, sem abrir o navegador")
+	rescore.add_argument("--source", help="meu-padrinho ou linkedin")
+	rescore.add_argument("--limit", type=int)
+	rescore.add_argument("--workers", type=int, help="Avaliações em paralelo (padrão: PIPELINE_LLM_WORKERS)")
+	rescore.add_argument("--dry-run", action="store_true", help="Mostra as novas notas sem gravar")
+	mode = rescore.add_mutually_exclusive_group()
+	mode.add_argument("--batch", action="store_true", help="Envia as vagas para a API de lotes (mais barata, resultado em até 24h)")
+	mode.add_argument("--collect", nargs="?", const="", metavar="BATCH_ID", help="Grava os resultados dos lotes concluídos (todos os pendentes se omitido)")
+	rescore.set_defaults(func=cmd_rescore)
 
-		browser.close()
+	compact = commands.add_parser("compact", help="Arquiva vagas antigas ou de score baixo e libera espaço no banco")
+	compact.add_argument("--days", type=int, help="Arquiva vagas mais antigas que N dias (padrão: RETENTION_DAYS)")
+	compact.add_argument("--min-score", type=float, help="Arquiva vagas com score abaixo deste (padrão: RETENTION_MIN_SCORE)")
+	compact.set_defaults(func=cmd_compact)
 
-		logger.info("=== Job Scout finalizado ===")
+	return parser
 
-if __name__ == "__main__":
-	db = Storage(db_path=config.db_path)
-	evaluator = Evaluator(api_key=config.api_key, model=config.model)
-	notifier = get_notifier()
 
-	main()
\ No newline at end of file
+def main(argv=None):
+	started = time.perf_counter()
+	modules_before = len(sys.modules)
+
+	argv = list(sys.argv[1:] if argv is None else argv)
+	# Sem subcomando, mantém o comportamento antigo de `python -m app.main [--flags]`
+	if not any(arg in COMMANDS for arg in argv) and not {"-h", "--help"} & set(argv):
+		argv = [a for a in argv if a in GLOBAL_FLAGS] + ["run"] + [a for a in argv if a not in GLOBAL_FLAGS]
+
+	args = build_parser().parse_args(argv)
+
+	if args.command not in ("run", "rescore") and not args.verbose:
+		import logging
+		from app.logger import logger
+
+		logger.set_level(logging.WARNING)
+
+	code = args.func(args)
+
+	if args.timing:
+		elapsed_ms = (time.perf_counter() - started) * 1000
+		print(
+			f"[{args.command}] {elapsed_ms:.1f} ms, {len(sys.modules) - modules_before} módulos importados",
+			file=sys.stderr,
+		)
+	return code or 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
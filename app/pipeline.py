@@ -0,0 +1,151 @@
+import asyncio
+import time
+from contextlib import aclosing
+from .logger import logger
+
+_DONE = object()
+
+
+class Pipeline:
+	def __init__(self, evaluate, notify, save, llm_workers=3, queue_size=10, save_batch_size=20,
+			evaluate_batch=None, llm_batch_size=1):
+		self.evaluate = evaluate
+		self.evaluate_batch = evaluate_batch
+		self.llm_batch_size = max(1, llm_batch_size) if evaluate_batch else 1
+		self.notify = notify
+		self.save = save
+		self.llm_workers = max(1, llm_workers)
+		self.queue_size = max(1, queue_size)
+		self.save_batch_size = max(1, save_batch_size)
+		self.stats = {"queued": 0, "duplicates": 0, "evaluated": 0, "saved": 0, "failed": 0}
+		self._seen = set()
+
+	async def run(self, producers):
+		# Filas limitadas: um estágio lento trava o anterior em vez de acumular itens em memória
+		eval_queue = asyncio.Queue(self.queue_size)
+		notify_queue = asyncio.Queue(self.queue_size)
+		save_queue = asyncio.Queue(self.queue_size)
+		started = time.perf_counter()
+
+		producer_tasks = [asyncio.create_task(self._produce(p, eval_queue)) for p in producers]
+		llm_tasks = [
+			asyncio.create_task(self._evaluate_worker(eval_queue, notify_queue))
+			for _ in range(self.llm_workers)
+		]
+		notify_task = asyncio.create_task(self._notify_worker(notify_queue, save_queue))
+		save_task = asyncio.create_task(self._save_worker(save_queue))
+		all_tasks = producer_tasks + llm_tasks + [notify_task, save_task]
+
+		try:
+			await asyncio.gather(*producer_tasks)
+			for _ in llm_tasks:
+				await eval_queue.put(_DONE)
+			await asyncio.gather(*llm_tasks)
+			await notify_queue.put(_DONE)
+			await notify_task
+			await save_queue.put(_DONE)
+			await save_task
+		finally:
+			for task in all_tasks:
+				task.cancel()
+
+		elapsed = time.perf_counter() - started
+		logger.info(
+			f"Pipeline finalizado em {elapsed:.1f}s: "
+			f"{self.stats['evaluated']} avaliadas, {self.stats['saved']} salvas, "
+			f"{self.stats['failed']} falhas, {self.stats['duplicates']} duplicadas"
+		)
+		return self.stats
+
+	async def _produce(self, producer, eval_queue):
+		try:
+			async with aclosing(producer) as items:
+				async for item in items:
+					link = item.get("link")
+					if link in self._seen:
+						self.stats["duplicates"] += 1
+						continue
+					self._seen.add(link)
+					self.stats["queued"] += 1
+					await eval_queue.put(item)
+		except Exception as e:
+			logger.exception(f"Erro no estágio de coleta: {e}")
+
+	async def _evaluate_worker(self, eval_queue, notify_queue):
+		done = False
+		while not done:
+			batch = [await eval_queue.get()]
+			# Com avaliação em lote, leva junto o que já estiver esperando na fila
+			while len(batch) < self.llm_batch_size and not eval_queue.empty() and batch[-1] is not _DONE:
+				batch.append(eval_queue.get_nowait())
+
+			if batch[-1] is _DONE:
+				batch.pop()
+				done = True
+
+			if not batch:
+				continue
+
+			for entry in await self._evaluate_items(batch):
+				await notify_queue.put(entry)
+
+	async def _evaluate_items(self, batch):
+		if len(batch) > 1:
+			try:
+				results = await asyncio.to_thread(self.evaluate_batch, batch)
+			except Exception as e:
+				self.stats["failed"] += len(batch)
+				logger.exception(f"Erro ao avaliar lote de {len(batch)} vagas: {e}")
+				return []
+			# Itens sem resultado falharam sozinhos; os demais do lote seguem normalmente
+			entries = [(item, result) for item, result in zip(batch, results) if result is not None]
+			self.stats["failed"] += len(batch) - len(entries)
+			self.stats["evaluated"] += len(entries)
+			return entries
+
+		item = batch[0]
+		try:
+			result = await asyncio.to_thread(self.evaluate, item)
+		except Exception as e:
+			self.stats["failed"] += 1
+			logger.exception(f"Erro ao avaliar vaga {item.get('link')}: {e}")
+			return []
+
+		self.stats["evaluated"] += 1
+		return [(item, result)]
+
+	async def _notify_worker(self, notify_queue, save_queue):
+		while True:
+			entry = await notify_queue.get()
+			if entry is _DONE:
+				return
+
+			item, result = entry
+			try:
+				await asyncio.to_thread(self.notify, item, result)
+			except Exception as e:
+				logger.exception(f"Erro ao notificar vaga {item.get('link')}: {e}")
+
+			await save_queue.put(entry)
+
+	async def _save_worker(self, save_queue):
+		done = False
+		while not done:
+			batch = [await save_queue.get()]
+			# Agrupa o que já estiver na fila para gravar tudo numa transação só
+			while len(batch) < self.save_batch_size and not save_queue.empty():
+				batch.append(save_queue.get_nowait())
+
+			if batch[-1] is _DONE:
+				batch.pop()
+				done = True
+
+			if not batch:
+				continue
+
+			try:
+				await asyncio.to_thread(self.save, batch)
+				self.stats["saved"] += len(batch)
+			except Exception as e:
+				self.stats["failed"] += len(batch)
+				logger.exception(f"Erro ao salvar lote de {len(batch)} vagas: {e}")
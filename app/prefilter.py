@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from .evaluator import EvalResult
+from .logger import logger
+
+DEFAULT_ALIASES = {
+	".net": ["dotnet", "asp.net", ".net core", "c#"],
+	"java": ["spring boot"],
+	"vue": ["vue.js", "vuejs", "vue 3", "vue3", "nuxt"],
+	"typescript": ["ts"],
+	"react": ["react.js", "reactjs"],
+	"angular": ["angularjs"],
+	"node": ["node.js", "nodejs"],
+}
+
+SENIORITY_TERMS = {
+	"estagio": ["estagiario", "estagiaria", "intern", "internship"],
+	"junior": ["jr"],
+	"pleno": ["mid-level", "mid level"],
+	"senior": ["sr"],
+	# "principal" e "staff" sozinhos são comuns em português ("tecnologia principal") e em
+	# inglês fora do cargo ("staff augmentation"), então só contam seguidos do cargo
+	"especialista": [
+		"specialist", "staff engineer", "staff software engineer", "staff developer",
+		"principal engineer", "principal software engineer", "principal developer",
+	],
+}
+
+DEFAULT_JOB_TERMS = [
+	"vaga", "vagas", "contratando", "contratamos", "contratação", "oportunidade", "oportunidades",
+	"procuramos", "buscamos", "estamos buscando", "recrutando", "candidate-se",
+	"hiring", "we're hiring", "job", "jobs", "opening", "position", "role", "apply",
+]
+
+
+def _fold(text):
+	text = unicodedata.normalize("NFKD", text or "")
+	text = "".join(c for c in text if not unicodedata.combining(c))
+	return text.lower()
+
+
+class Prefilter:
+	def __init__(self, profile):
+		settings = profile.get("prefilter", {}) or {}
+		self.enabled = settings.get("enabled", True)
+		self.require_must_have = settings.get("require_must_have", False)
+		self.check_seniority = settings.get("check_seniority", True)
+
+		aliases = {k: list(v) for k, v in DEFAULT_ALIASES.items()}
+		for term, extra in (settings.get("aliases", {}) or {}).items():
+			aliases.setdefault(str(term).lower(), []).extend(extra or [])
+
+		# "Sênior", "sr" e "senior" no perfil viram a mesma categoria que o texto da vaga produz
+		canonical_seniority = {
+			_fold(variant): canonical
+			for canonical, variants in SENIORITY_TERMS.items()
+			for variant in [canonical] + variants
+		}
+		self.target_seniority = {
+			canonical_seniority.get(_fold(str(s)), _fold(str(s))) for s in profile.get("target_seniority", [])
+		}
+		self.checked = 0
+		self.rejected = 0
+
+		# Cada variante aponta para (categoria, termo canônico); um único regex cobre todas
+		self._lookup = {}
+		self._add_terms("avoid", profile.get("avoid", []), aliases)
+		self._add_terms("must_have", profile.get("must_have", []), aliases)
+		self._add_terms("job", settings.get("job_terms", DEFAULT_JOB_TERMS), {})
+		if self.check_seniority and self.target_seniority:
+			self._add_terms("seniority", SENIORITY_TERMS.keys(), SENIORITY_TERMS)
+
+		variants = sorted(self._lookup, key=len, reverse=True)
+		self._pattern = None
+		if variants:
+			alternation = "|".join(re.escape(v) for v in variants)
+			self._pattern = re.compile(rf"(?<![\w.#+-])(?:{alternation})(?![\w#+])")
+
+	def reset_stats(self):
+		self.checked = 0
+		self.rejected = 0
+
+	def _add_terms(self, category, terms, aliases):
+		for term in terms:
+			canonical = _fold(str(term))
+			for variant in [canonical] + [_fold(a) for a in aliases.get(canonical, [])]:
+				self._lookup.setdefault(variant, {})[category] = canonical
+
+	def match(self, text):
+		found = {"avoid": set(), "must_have": set(), "job": set(), "seniority": set()}
+		if not self._pattern:
+			return found
+
+		for m in self._pattern.finditer(_fold(text)):
+			for category, canonical in self._lookup[m.group(0)].items():
+				found[category].add(canonical)
+		return found
+
+	def check(self, text, require_job_terms=False, strict_avoid=False):
+		if not self.enabled:
+			return None
+
+		self.checked += 1
+		found = self.match(text)
+		reason = None
+
+		if require_job_terms and not found["job"]:
+			reason = "O post não parece anunciar uma vaga"
+		elif found["avoid"] and (strict_avoid or not found["must_have"]):
+			reason = f"Menciona tecnologias a evitar: {', '.join(sorted(found['avoid']))}"
+		elif self.require_must_have and not found["must_have"]:
+			reason = "Não menciona nenhuma tecnologia obrigatória"
+		elif found["seniority"] and not found["seniority"] & self.target_seniority:
+			reason = f"Senioridade fora do alvo: {', '.join(sorted(found['seniority']))}"
+
+		if not reason:
+			return None
+
+		self.rejected += 1
+		logger.debug(f"Pré-filtro: {reason}")
+		return EvalResult(
+			score=0,
+			decision="skip",
+			confidence=1.0,
+			reasons=[reason],
+			matched_skills=sorted(found["must_have"]),
+			missing_skills=[],
+			notes="Descartada pelo pré-filtro local, sem chamada ao LLM.",
+			model="prefilter",
+		)
@@ -0,0 +1,52 @@
+import threading
+import time
+
+
+class TokenBucket:
+	def __init__(self, per_minute):
+		self.capacity = float(per_minute)
+		self.rate = self.capacity / 60.0
+		self.tokens = self.capacity
+		self.updated_at = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _refill(self):
+		now = time.monotonic()
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+		self.updated_at = now
+
+	def acquire(self, amount=1):
+		# Pedidos maiores que a capacidade esperam o balde encher e o deixam negativo;
+		# os próximos esperam a dívida ser paga, então a média por minuto é respeitada
+		amount = float(amount)
+		needed = min(amount, self.capacity)
+		while True:
+			with self._lock:
+				self._refill()
+				if self.tokens >= needed:
+					self.tokens -= amount
+					return
+				wait_s = (needed - self.tokens) / self.rate
+			time.sleep(wait_s)
+
+	def adjust(self, delta):
+		with self._lock:
+			self._refill()
+			self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class RateLimiter:
+	def __init__(self, requests_per_minute=0, tokens_per_minute=0):
+		self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+		self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+	def acquire(self, estimated_tokens=0):
+		if self.requests:
+			self.requests.acquire(1)
+		if self.tokens and estimated_tokens:
+			self.tokens.acquire(estimated_tokens)
+
+	def record_usage(self, estimated_tokens, actual_tokens):
+		# Corrige a estimativa feita antes da chamada com o 'usage' devolvido pela API
+		if self.tokens and actual_tokens is not None:
+			self.tokens.adjust(actual_tokens - estimated_tokens)
@@ -0,0 +1,416 @@
+import asyncio
+from patchright.async_api import async_playwright
+from .browser import ResourceBlocker
+from .cache import EvaluationCache
+from .config import config
+from .daemon import Daemon, ScheduledJob
+from .dedup import PENDING, NearDuplicateIndex
+from .evaluator import EvalResult, Evaluator
+from .logger import logger
+from .notifier import ConsoleNotifier, get_notifier
+from .pipeline import Pipeline
+from .prefilter import Prefilter
+from .ratelimit import RateLimiter
+from .sources import load_sources
+from .storage import Storage
+from .telemetry import parse_prices, telemetry
+from datetime import datetime
+import os
+
+db = None
+cache = None
+evaluator = None
+notifier = None
+prefilter = None
+near_duplicates = None
+sources = []
+fingerprint = None
+dry_run = False
+
+def setup(notifier_override=None, dry_run_mode=False):
+	global db, cache, evaluator, notifier, prefilter, near_duplicates, sources, fingerprint, dry_run
+
+	dry_run = dry_run_mode
+	db = Storage(
+		db_path=config.db_path,
+		compress_min_bytes=config.storage_compress_min_bytes,
+		read_only=dry_run,
+	)
+	cache = EvaluationCache(
+		db_path=config.db_path,
+		ttl_days=config.eval_cache_ttl_days,
+		max_entries=config.eval_cache_max_entries,
+		read_only=dry_run,
+	)
+	evaluator = Evaluator(
+		api_key=config.api_key,
+		model=config.model,
+		cache=cache,
+		limiter=RateLimiter(config.llm_requests_per_minute, config.llm_tokens_per_minute),
+		max_retries=config.llm_max_retries,
+		backoff_s=config.llm_backoff,
+		pool_size=config.pipeline_llm_workers,
+		escalation_model=config.escalation_model,
+		escalation_band=config.escalation_band,
+		escalation_min_confidence=config.escalation_min_confidence,
+		notify_threshold=config.min_score,
+		base_url=config.llm_base_url,
+	)
+	fingerprint = evaluator.fingerprint(config.resume, config.profile)
+	# No --dry-run as vagas aprovadas só aparecem no log
+	notifier = notifier_override or (ConsoleNotifier() if dry_run else get_notifier())
+	prefilter = Prefilter(config.profile)
+	near_duplicates = NearDuplicateIndex(db_path=config.db_path, threshold=config.near_duplicate_threshold)
+	sources = load_sources(config.sources, db, config.environment)
+	# No --dry-run a telemetria só aparece no log, sem gravar a execução nem exportar métricas
+	telemetry.configure(
+		None if dry_run else config.db_path,
+		None if dry_run else config.metrics_textfile,
+		parse_prices(config.llm_prices),
+	)
+
+def close():
+	# Cache e índice de duplicatas têm conexões próprias no mesmo banco
+	db.close()
+	cache.close()
+	near_duplicates.close()
+
+def shortcut_evaluation(job_data, wait=True):
+	if job_data["source"] == "linkedin":
+		rejection = prefilter.check(job_data["description"], require_job_terms=True, strict_avoid=True)
+	else:
+		rejection = prefilter.check(f"{job_data['title']}\n{job_data['description']}")
+
+	if rejection:
+		logger.info(f"Descartada pelo pré-filtro: {rejection.reasons[0]} | {job_data['link']}")
+		return rejection
+
+	archived = db.find_archived(job_data["description"])
+	if archived and archived[0] != job_data["link"]:
+		original_link, score = archived
+		# A arquivada só guarda a nota; o alerta, se houve, já foi enviado com ela
+		job_data["duplicate_of"] = original_link
+		logger.info(f"Reaproveitando nota de vaga arquivada com o mesmo texto: {original_link} | {job_data['link']}")
+		return EvalResult(
+			score=score or 0,
+			decision="apply" if (score or 0) >= config.min_score else "skip",
+			confidence=1.0,
+			reasons=["Mesmo texto de uma vaga já avaliada e arquivada"],
+			matched_skills=[],
+			missing_skills=[],
+			notes=f"Conteúdo idêntico a {original_link}, avaliada antes do arquivamento.",
+			model="archive",
+		)
+
+	if job_data["source"] == "linkedin":
+		# Só reaproveita avaliações feitas com o mesmo currículo, perfil e prompt. Sem duplicata o post
+		# fica reservado até record_evaluation(), ou até release() se a avaliação falhar
+		duplicate = near_duplicates.claim(
+			job_data["link"], job_data["description"], fingerprint=fingerprint, wait_s=None if wait else 0
+		)
+		if duplicate and duplicate[1] is PENDING:
+			return PENDING
+		if duplicate:
+			original_link, evaluation = duplicate
+			score_result = EvalResult.from_dict(evaluation)
+			score_result.notes = f"Post quase idêntico a {original_link}. {score_result.notes}".strip()
+			job_data["title"] = score_result.title
+			job_data["company"] = score_result.company
+			job_data["duplicate_of"] = original_link
+			logger.info(f"Reaproveitando avaliação de post quase idêntico: {original_link} | {job_data['link']}")
+			return score_result
+
+	return None
+
+def record_evaluation(job_data, score_result):
+	if job_data["source"] == "linkedin":
+		job_data["title"] = score_result.title
+		job_data["company"] = score_result.company
+		evaluation = dict(score_result.to_dict(), fingerprint=fingerprint)
+		if dry_run:
+			near_duplicates.release(job_data["link"], evaluation)
+		else:
+			near_duplicates.add(job_data["link"], job_data["description"], evaluation)
+
+	logger.info(f"Score: {score_result.score}/100 | Decisão: {score_result.decision} | {job_data['link']}")
+	return score_result
+
+def evaluate_job(job_data):
+	score_result = shortcut_evaluation(job_data)
+	if score_result:
+		return score_result
+
+	try:
+		if job_data["source"] == "linkedin":
+			score_result = evaluator.evaluate_linkedin_post({"text": job_data["description"]}, config.resume, config.profile)
+		else:
+			score_result = evaluator.evaluate(job_data, config.resume, config.profile)
+	except Exception:
+		near_duplicates.release(job_data["link"])
+		raise
+
+	return record_evaluation(job_data, score_result)
+
+def evaluate_jobs(jobs):
+	# Sem esperar: o post parecido pode estar reservado por este mesmo lote
+	results = [shortcut_evaluation(job_data, wait=False) for job_data in jobs]
+	deferred = [i for i, score_result in enumerate(results) if score_result is PENDING]
+	try:
+		evaluate_pending(jobs, results)
+	finally:
+		for job_data, score_result in zip(jobs, results):
+			if score_result is None:
+				near_duplicates.release(job_data["link"])
+
+	# O original já foi avaliado (aqui ou em outro worker); a espera agora não trava o lote
+	for i in deferred:
+		try:
+			results[i] = evaluate_job(jobs[i])
+		except Exception as e:
+			logger.exception(f"Erro ao avaliar vaga {jobs[i]['link']}: {e}")
+			results[i] = None
+
+	return results
+
+def evaluate_pending(jobs, results):
+	for kind in ("job", "linkedin_post"):
+		# Posts do Linkedin têm prompt próprio; qualquer outra fonte é avaliada como vaga
+		indexes = [
+			i for i, job_data in enumerate(jobs)
+			if results[i] is None and ("linkedin_post" if job_data["source"] == "linkedin" else "job") == kind
+		]
+		if not indexes:
+			continue
+
+		if kind == "linkedin_post":
+			items = [{"text": jobs[i]["description"], "link": jobs[i]["link"]} for i in indexes]
+		else:
+			items = [jobs[i] for i in indexes]
+
+		batch_results = evaluator.evaluate_batch(items, config.resume, config.profile, kind=kind)
+		for i, score_result in zip(indexes, batch_results):
+			results[i] = record_evaluation(jobs[i], score_result) if score_result else None
+
+def notify_job(job_data, score_result):
+	if job_data.get("duplicate_of"):
+		logger.debug(f"Alerta suprimido: já notificado em {job_data['duplicate_of']}")
+	elif score_result.score >= config.min_score:
+		notifier.notify_job(job_data, score_result)
+	else:
+		logger.debug(f"Score abaixo do mínimo ({config.min_score})")
+
+def save_jobs(entries):
+	for job_data, score_result in entries:
+		job_data["evaluation"] = score_result.to_dict()
+		job_data["fingerprint"] = fingerprint
+	db.save_jobs([job_data for job_data, _ in entries])
+
+def update_evaluations(entries, batch_fingerprint=None):
+	for job_data, score_result in entries:
+		job_data["evaluation"] = score_result.to_dict()
+		job_data["fingerprint"] = batch_fingerprint or fingerprint
+	db.update_evaluations([job_data for job_data, _ in entries])
+
+def build_blocker():
+	return ResourceBlocker(
+		blocked_types=config.scraper_block_resources,
+		allowed_domains=config.scraper_allowed_domains,
+	)
+
+def build_pipeline(notify=notify_job, save=save_jobs, llm_workers=None):
+	return Pipeline(
+		evaluate=telemetry.timed("evaluate", evaluate_job),
+		evaluate_batch=telemetry.timed("evaluate_batch", evaluate_jobs),
+		llm_batch_size=config.llm_batch_size,
+		notify=telemetry.timed("notify", notify),
+		save=telemetry.timed("save", save),
+		llm_workers=llm_workers or config.pipeline_llm_workers,
+		queue_size=config.pipeline_queue_size,
+	)
+
+def start_run(command, blocker):
+	# No daemon o bloqueador, o cache e o pré-filtro vivem entre execuções; os contadores
+	# zeram junto com a telemetria para o log de cada execução mostrar só a dela
+	evaluator.cache.reset_stats()
+	prefilter.reset_stats()
+	blocker.reset_stats()
+	telemetry.start_run(command)
+
+def log_run_stats(blocker):
+	cache_stats = evaluator.cache.stats()
+	logger.info(
+		f"Cache de avaliações: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+		f"({cache_stats['hit_rate']:.0%})"
+	)
+	logger.info(f"Pré-filtro: {prefilter.rejected} de {prefilter.checked} vagas descartadas sem LLM")
+	block_stats = blocker.stats()
+	logger.info(
+		f"Navegador: {block_stats['blocked']} requisições bloqueadas {block_stats['blocked_by_type']}, "
+		f"~{block_stats['saved_bytes'] / 1024:.0f} KB economizados, "
+		f"{block_stats['loaded']} carregadas ({block_stats['loaded_bytes'] / 1024:.0f} KB)"
+	)
+
+def compact_storage():
+	db.compact(retention_days=config.retention_days, min_score=config.retention_min_score)
+
+async def run(backfill=False, force=False):
+	if force:
+		await rescore_stale()
+
+	async with async_playwright() as p:
+		browser = await p.chromium.launch()
+		blocker = build_blocker()
+
+		producers = [
+			source.records(await source.new_context(browser, blocker), backfill=backfill)
+			for source in sources
+		]
+
+		start_run("backfill" if backfill else "run", blocker)
+		stats = await build_pipeline().run(producers)
+		for source in sources:
+			source.commit()
+		log_run_stats(blocker)
+		telemetry.finish_run(stats)
+
+		await browser.close()
+
+		if not dry_run and config.storage_compact_interval and db.compaction_due(config.storage_compact_interval):
+			compact_storage()
+		close()
+
+		logger.info("=== Job Scout finalizado ===")
+
+async def run_daemon(force=False):
+	if not sources:
+		logger.error("Nenhuma fonte ativa; confira o sources.yaml")
+		close()
+		return
+
+	if force:
+		await rescore_stale()
+
+	blocker = build_blocker()
+
+	def poll(source, partition):
+		async def run_source(daemon):
+			context = await daemon.context(source.name, lambda browser: source.new_context(browser, blocker))
+			start_run(f"daemon:{source.name}", blocker)
+			stats = await build_pipeline().run([source.records(context, partition=partition)])
+			source.commit()
+			log_run_stats(blocker)
+			telemetry.finish_run(stats)
+		return run_source
+
+	async def compact(daemon):
+		await asyncio.to_thread(compact_storage)
+
+	jobs = []
+	for source in sources:
+		# Partes de uma mesma fonte (ex: buscas do Linkedin) são espalhadas ao longo do intervalo
+		interval_s = source.interval * 60
+		partitions = source.partitions()
+		for i, partition in enumerate(partitions):
+			jobs.append(ScheduledJob(
+				f"{source.name}: {partition}" if partition else source.name,
+				interval_s,
+				poll(source, partition),
+				delay_s=i * interval_s / len(partitions),
+			))
+
+	if config.storage_compact_interval:
+		compact_interval_s = config.storage_compact_interval * 3600
+		due = db.compaction_due(config.storage_compact_interval)
+		jobs.append(ScheduledJob("compactação do banco", compact_interval_s, compact, delay_s=0 if due else compact_interval_s))
+
+	async with async_playwright() as p:
+		daemon = Daemon(
+			launch=p.chromium.launch,
+			jobs=jobs,
+			jitter_s=config.daemon_jitter,
+			recycle_pages=config.daemon_recycle_pages,
+			recycle_memory_mb=config.daemon_recycle_memory_mb,
+		)
+		await daemon.run()
+
+	close()
+	logger.info("=== Job Scout finalizado ===")
+
+def skip_notification(job_data, score_result):
+	logger.info(f"Reavaliada: {job_data.get('evaluation_score')} -> {score_result.score} | {job_data['link']}")
+
+async def rescore_stale(source=None, limit=None, workers=None):
+	# Só as vagas avaliadas com outra impressão digital; como cada lote gravado já recebe a
+	# impressão atual, uma reavaliação interrompida continua de onde parou na próxima execução
+	stale = db.count_stale(fingerprint, source=source)
+	logger.info(f"{sum(stale.values())} vagas com avaliação desatualizada {stale or ''}".strip())
+
+	async def stored_jobs():
+		for job_data in db.iter_jobs(source=source, limit=limit, stale_fingerprint=fingerprint):
+			yield job_data
+
+	# Reavalia a descrição já gravada, sem abrir o navegador
+	telemetry.start_run("rescore")
+	stats = await build_pipeline(notify=skip_notification, save=update_evaluations, llm_workers=workers).run([stored_jobs()])
+	telemetry.finish_run(stats)
+	return stats
+
+async def rescore(source=None, limit=None, workers=None):
+	stats = await rescore_stale(source=source, limit=limit, workers=workers)
+	close()
+	return stats
+
+def batch_entry(job_data):
+	if job_data["source"] == "linkedin":
+		return "linkedin_post", {"text": job_data["description"], "link": job_data["link"]}
+	return "job", job_data
+
+def submit_rescore_batch(source=None, limit=None):
+	# Vagas resolvidas pelo pré-filtro são gravadas na hora; o resto vai para a API de lotes,
+	# mais barata e com resultado em até 24h, coletado depois com collect_rescore_batches()
+	shortcuts = []
+
+	def pending_entries():
+		for job_data in db.iter_jobs(source=source, limit=limit, stale_fingerprint=fingerprint):
+			score_result = shortcut_evaluation(job_data)
+			# O resultado só chega na coleta, em outro processo; a reserva não serve para nada aqui
+			near_duplicates.release(job_data["link"])
+			if score_result:
+				shortcuts.append((job_data, score_result))
+			else:
+				yield batch_entry(job_data)
+
+	batch_dir = os.path.join(os.path.dirname(config.db_path) or ".", "batches")
+	os.makedirs(batch_dir, exist_ok=True)
+	path = os.path.join(batch_dir, f"rescore-{datetime.utcnow():%Y%m%d%H%M%S}.jsonl")
+	count = evaluator.write_batch_file(pending_entries(), config.resume, config.profile, path)
+	update_evaluations(shortcuts)
+
+	if not count:
+		os.remove(path)
+		return None
+
+	batch_id = evaluator.submit_batch(path)
+	# Guarda a impressão digital do envio: se o perfil mudar antes da coleta, o resultado continua desatualizado
+	db.set_watermark("llm-batch", batch_id, fingerprint)
+	return batch_id
+
+def collect_rescore_batches(batch_id=None):
+	submitted = db.get_watermarks("llm-batch")
+	saved = 0
+	for batch_id in [batch_id] if batch_id else list(submitted):
+		results = evaluator.collect_batch(batch_id)
+		if results is None:
+			continue
+
+		entries = []
+		for link, score_result in results.items():
+			job_data = db.get_job(link)
+			if not job_data or job_data.get("archived"):
+				continue
+			entries.append((job_data, record_evaluation(job_data, score_result)))
+
+		update_evaluations(entries, batch_fingerprint=submitted.get(batch_id))
+		db.delete_watermark("llm-batch", batch_id)
+		saved += len(entries)
+	return saved
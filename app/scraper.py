@@ -1,51 +1,412 @@
-import json
-from patchright.sync_api import BrowserContext
+import asyncio
+import re
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from patchright.async_api import BrowserContext
+from .browser import DomainLimiter, PagePool
 from .logger import logger
+from .telemetry import telemetry
+
+# Extrai todos os campos da página de detalhes numa única chamada ao navegador
+EXTRACT_DETAILS_JS = """
+({title, company, description, applyText}) => {
+    const text = el => el ? el.textContent.trim() : null;
+    const normalize = value => value.replace(/\\s+/g, " ").trim().toLowerCase();
+    const apply = Array.from(document.querySelectorAll("a"))
+        .find(a => normalize(a.textContent).includes(normalize(applyText)));
+
+    return {
+        title: text(document.querySelector(title)),
+        company: text(document.querySelector(company)),
+        description_items: Array.from(document.querySelectorAll(description)).map(el => el.innerText),
+        subscription_link: apply ? apply.getAttribute("href") : null,
+    };
+}
+"""
+
+# Clica no botão de "carregar mais" se existir; senão rola até o fim para disparar o scroll infinito
+LOAD_MORE_JS = """
+(texts) => {
+    const button = Array.from(document.querySelectorAll("button, a"))
+        .find(el => texts.some(t => el.textContent.trim().toLowerCase().startsWith(t)));
+    if (button) {
+        button.click();
+        return true;
+    }
+    window.scrollTo(0, document.body.scrollHeight);
+    return false;
+}
+"""
+
+# Chaves usadas pela API do site para cada campo; a primeira presente vence
+ID_KEYS = ("slug", "id", "uuid")
+TITLE_KEYS = ("titulo", "title", "cargo")
+COMPANY_KEYS = ("empresa", "company", "nomeEmpresa", "companyName")
+DESCRIPTION_KEYS = ("descricao", "description", "requisitos", "responsabilidades")
+APPLY_KEYS = ("linkCandidatura", "urlCandidatura", "applyUrl", "applicationUrl")
+
+
+def _first(obj, keys):
+    for key in keys:
+        value = obj.get(key)
+        if value:
+            return value
+    return None
+
+
+def _as_text(value):
+    if isinstance(value, dict):
+        value = value.get("nome") or value.get("name") or ""
+    if isinstance(value, list):
+        value = "; ".join(_as_text(v) for v in value if v)
+    return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", str(value or ""))).strip()
+
+
+def _job_objects(payload):
+    # Percorre o JSON procurando objetos que parecem vagas (têm título e identificador)
+    if isinstance(payload, list):
+        for item in payload:
+            yield from _job_objects(item)
+    elif isinstance(payload, dict):
+        if _first(payload, TITLE_KEYS) and _first(payload, ID_KEYS):
+            yield payload
+        for value in payload.values():
+            if isinstance(value, (list, dict)):
+                yield from _job_objects(value)
+
+
+def _slug(link):
+    return urlparse(link).path.rstrip("/").split("/")[-1]
+
+
+def _matches(obj, slug):
+    for key in ID_KEYS:
+        value = str(obj.get(key) or "")
+        if value and (slug == value or slug.endswith(f"-{value}") or slug.startswith(f"{value}-")):
+            return True
+    return False
+
+
+def _is_json(response):
+    return "json" in (response.headers.get("content-type") or "")
+
 
 class Scraper:
-    def __init__(self, context: BrowserContext):
+    CARD_SELECTOR = "div.flex.flex-col.space-y-4.max-w-4xl.mx-auto a.card-job"
+    # Seletor do H1 que você encontrou
+    TITLE_SELECTOR = "h1.text-2xl.md\\:text-3xl.font-serif.font-bold.mb-2.text-claude-dark"
+    COMPANY_SELECTOR = "div.flex.items-center.flex-wrap.gap-x-4.gap-y-1.mb-1.text-claude-gray-700 span.font-medium"
+    DESCRIPTION_SELECTOR = "ul.space-y-1.text-claude-gray-700.text-sm.pl-2"
+    APPLY_TEXT = "Candidatar-se agora"
+    LOAD_MORE_TEXTS = ["carregar mais", "ver mais vagas", "mostrar mais"]
+    LOAD_MORE_TIMEOUT_MS = 10000
+
+    def __init__(self, context: BrowserContext, pages=4, max_per_domain=4, delay_s=0.0, use_api=True,
+                 storage=None, stop_after_seen=5, max_pages=10, base_url="https://meupadrinho.com.br"):
         self.context = context
+        self.base_url = base_url.rstrip("/")
+        self.storage = storage
+        self.stop_after_seen = stop_after_seen
+        self.max_pages = max_pages
+        self.pool = PagePool(context, size=pages)
+        # Extrações em andamento ao mesmo tempo; o resto dos links espera sem virar tarefa
+        self.in_flight = max(1, pages) * 2
+        self.limiter = DomainLimiter(max_per_domain=max_per_domain, delay_s=delay_s)
+        self.use_api = use_api
+        self.stats = Counter()
+        self._api_jobs = {}
+        # O modelo da URL aprendido numa execução anterior evita renderizar a primeira vaga de novo
+        self._detail_url = storage.get_watermark("meu-padrinho", "detail_url") if storage else None
+        self._pending_watermark = None
+
+    @contextmanager
+    def _capture(self, page, enabled=True):
+        responses = []
+
+        def on_response(response):
+            if _is_json(response):
+                responses.append(response)
+
+        enabled = enabled and self.use_api
+        if enabled:
+            page.on("response", on_response)
+        try:
+            yield responses
+        finally:
+            # As páginas voltam para o pool; o listener não pode ficar acumulando
+            if enabled:
+                page.remove_listener("response", on_response)
+
+    async def _payloads(self, responses):
+        payloads = []
+        for response in responses:
+            try:
+                payloads.append((response.url, await response.json()))
+            except Exception:
+                continue
+        return payloads
+
+    def _job_from_api(self, obj, job_link):
+        title = _as_text(_first(obj, TITLE_KEYS))
+        description = _as_text(_first(obj, DESCRIPTION_KEYS))
+        if not title or not description:
+            return None
+
+        apply = _first(obj, APPLY_KEYS)
+        return {
+            "title": title,
+            "company": _as_text(_first(obj, COMPANY_KEYS)),
+            "description": description,
+            "link": job_link,
+            "subscription_link": apply if isinstance(apply, str) and apply.startswith("http") else None,
+        }
 
-    def get_job_links(self):
+    async def _card_links(self, page, start=0):
+        hrefs = await page.eval_on_selector_all(self.CARD_SELECTOR, "els => els.map(e => e.getAttribute('href'))")
+        return [f"{self.base_url}{l}" if l else None for l in hrefs[start:]]
+
+    async def _load_more(self, page, count, timeout_ms=None):
+        await page.evaluate(LOAD_MORE_JS, self.LOAD_MORE_TEXTS)
+        try:
+            await page.wait_for_function(
+                "([selector, count]) => document.querySelectorAll(selector).length > count",
+                arg=[self.CARD_SELECTOR, count],
+                timeout=timeout_ms or self.LOAD_MORE_TIMEOUT_MS,
+            )
+            return True
+        except Exception:
+            return False
+
+    async def get_job_links(self, backfill=False):
         logger.debug("Aguardando carregamento da página...")
-        page = self.context.new_page()
-        page.goto("https://meupadrinho.com.br/", wait_until="domcontentloaded")
+        async with self.pool.page() as page:
+            with self._capture(page) as responses:
+                await page.goto(f"{self.base_url}/", wait_until="domcontentloaded")
+
+                await page.wait_for_selector("a.card-job", timeout=10000)
+
+                links, newest = await self._collect_links(page, backfill)
+                payloads = await self._payloads(responses)
+
+        if newest:
+            self._pending_watermark = (newest, links)
+
+        self._index_listing(payloads, links)
+
+        logger.info(f"Encontrados {len(links)} links de vagas ({len(self._api_jobs)} com dados completos na API)")
+        return links
+
+    def commit_watermark(self):
+        # Chamado depois que o pipeline gravou as vagas: se alguma da listagem falhou na
+        # extração ou na avaliação, a marca d'água fica onde estava e ela é tentada de novo
+        if not self.storage or not self._pending_watermark:
+            return
+
+        newest, links = self._pending_watermark
+        self._pending_watermark = None
+        missing = self.storage.filter_unvisited(links)
+        if missing:
+            logger.info(f"{len(missing)} vagas não gravadas; marca d'água do Meu Padrinho mantida")
+            return
+        self.storage.set_watermark("meu-padrinho", "", newest)
+
+    async def _collect_links(self, page, backfill):
+        # A listagem vem da vaga mais nova para a mais antiga: para na vaga mais nova
+        # da execução anterior ou numa sequência de vagas já vistas. A primeira página
+        # é sempre lida inteira; no backfill a listagem é percorrida até o fim
+        watermark = None if backfill or not self.storage else self.storage.get_watermark("meu-padrinho")
+        stop_after_seen = None if backfill else self.stop_after_seen
+        links = []
+        collected = set()
+        newest = None
+        seen_streak = 0
+        processed = 0
+        loaded_pages = 0
+
+        while True:
+            batch = await self._card_links(page, processed)
+            processed += len(batch)
+            # Uma consulta por lote de cards em vez de uma por vaga
+            unvisited = set(self.storage.filter_unvisited(batch)) if self.storage else None
+
+            reached = False
+            for link in batch:
+                if not link:
+                    continue
+
+                newest = newest or link
+                if link == watermark or (stop_after_seen and seen_streak >= stop_after_seen):
+                    reached = True
+                if reached and loaded_pages > 0:
+                    break
+
+                if unvisited is not None and link not in unvisited:
+                    seen_streak += 1
+                    continue
 
-        page.wait_for_selector("a.card-job", timeout=10000)
+                seen_streak = 0
+                if link not in collected:
+                    collected.add(link)
+                    links.append(link)
 
-        main_frame = page.locator("div.flex.flex-col.space-y-4.max-w-4xl.mx-auto")
-        card_jobs = main_frame.locator("a.card-job").all()
+            if reached:
+                logger.debug("Vagas já vistas alcançadas na listagem do Meu Padrinho")
+                break
 
-        links = [card.get_attribute("href") for card in card_jobs]
-        page.close()
+            if not backfill and loaded_pages >= self.max_pages:
+                break
 
-        logger.info(f"Encontrados {len(links)} links de vagas")
-        return [f"https://meupadrinho.com.br{l}" for l in links if l]
+            if not await self._load_more(page, processed):
+                logger.debug("Fim da listagem do Meu Padrinho")
+                break
 
-    def get_job_details(self, job_link):
-        logger.debug(f"Extraindo detalhes da vaga: {job_link}")
+            loaded_pages += 1
+            if backfill and loaded_pages % 10 == 0:
+                logger.info(f"Backfill: {processed} vagas listadas até agora...")
 
-        page = self.context.new_page()
-        page.goto(job_link, wait_until="domcontentloaded")
+        return links, newest
 
-        # Seletor do H1 que você encontrou
-        h1_selector = "h1.text-2xl.md\\:text-3xl.font-serif.font-bold.mb-2.text-claude-dark"
-        page.wait_for_selector(h1_selector)
-        title = page.locator(h1_selector).text_content().strip()
+    def _index_listing(self, payloads, links):
+        by_slug = {_slug(link): link for link in links}
+        for _, payload in payloads:
+            for obj in _job_objects(payload):
+                for slug, link in by_slug.items():
+                    if _matches(obj, slug):
+                        job = self._job_from_api(obj, link)
+                        if job:
+                            self._api_jobs[link] = job
+                        break
 
-        company_element = page.locator("div.flex.items-center.flex-wrap.gap-x-4.gap-y-1.mb-1.text-claude-gray-700")
-        company = company_element.locator("span.font-medium").text_content().strip()
+    def _learn_detail_url(self, payloads, job_link):
+        # A URL da API de detalhes é aprendida na primeira página renderizada
+        # e reaproveitada para buscar as próximas vagas sem abrir o navegador
+        slug = _slug(job_link)
+        for url, payload in payloads:
+            if slug not in url:
+                continue
+            for obj in _job_objects(payload):
+                if _matches(obj, slug) and self._job_from_api(obj, job_link):
+                    # O slug fica no fim do caminho; trocar a primeira ocorrência pegaria o domínio
+                    prefix, _, suffix = url.rpartition(slug)
+                    template = f"{prefix}{{slug}}{suffix}"
+                    if template == self._detail_url:
+                        return
+                    self._detail_url = template
+                    logger.info(f"API de detalhes das vagas encontrada: {self._detail_url}")
+                    if self.storage:
+                        self.storage.set_watermark("meu-padrinho", "detail_url", self._detail_url)
+                    return
 
-        description_items = page.locator("ul.space-y-1.text-claude-gray-700.text-sm.pl-2").all_inner_texts()
-        description = "; ".join(filter(None, [t.strip() for t in description_items])).replace("\n", " ")
+    async def _fetch_from_api(self, job_link):
+        slug = _slug(job_link)
+        response = await self.context.request.get(self._detail_url.format(slug=slug))
+        if not response.ok:
+            return None
 
-        subscription_link = page.locator("a").filter(has_text="Candidatar-se agora ").get_attribute("href")
+        for obj in _job_objects(await response.json()):
+            if _matches(obj, slug):
+                return self._job_from_api(obj, job_link)
+        return None
+
+    async def get_job_details(self, job_link):
+        if job_link in self._api_jobs:
+            self.stats["listing"] += 1
+            return self._api_jobs.pop(job_link)
+
+        job = await self._api_job_details(job_link)
+        if job:
+            return job
+
+        return await self._render_job_details(job_link)
+
+    async def _api_job_details(self, job_link):
+        if not self._detail_url:
+            return None
+        try:
+            async with self.limiter.limit(job_link):
+                job = await self._fetch_from_api(job_link)
+        except Exception as e:
+            logger.debug(f"Falha ao buscar vaga na API, usando a página: {job_link} ({e})")
+            return None
+        if job:
+            self.stats["api"] += 1
+        return job
+
+    async def _render_job_details(self, job_link):
+        async with self.pool.page() as page:
+            # Enquanto esta tarefa esperava uma página livre, outra pode ter aprendido a URL da API
+            job = await self._api_job_details(job_link)
+            if job:
+                return job
+
+            logger.debug(f"Extraindo detalhes da vaga: {job_link}")
+            self.stats["page"] += 1
+            # Até a API responder uma vez nesta execução, continua observando: o modelo salvo pode ter mudado
+            learning = not self._detail_url or not self.stats["api"]
+            async with self.limiter.limit(job_link):
+                with self._capture(page, enabled=learning) as responses:
+                    await page.goto(job_link, wait_until="domcontentloaded")
+
+                    await page.wait_for_selector(self.TITLE_SELECTOR)
+                    details = await page.evaluate(EXTRACT_DETAILS_JS, {
+                        "title": self.TITLE_SELECTOR,
+                        "company": self.COMPANY_SELECTOR,
+                        "description": self.DESCRIPTION_SELECTOR,
+                        "applyText": self.APPLY_TEXT,
+                    })
+                    if responses and learning:
+                        self._learn_detail_url(await self._payloads(responses), job_link)
+
+        if not details["title"]:
+            raise ValueError(f"Título não encontrado na vaga: {job_link}")
+
+        description = "; ".join(filter(None, [t.strip() for t in details["description_items"]])).replace("\n", " ")
 
-        page.close()
         return {
-            "title": title,
-            "company": company,
+            "title": details["title"],
+            "company": details["company"] or "",
             "description": description,
             "link": job_link,
-            "subscription_link": subscription_link
-        }
\ No newline at end of file
+            "subscription_link": details["subscription_link"]
+        }
+
+    async def _safe_job_details(self, job_link):
+        try:
+            with telemetry.span("scrape_job"):
+                return await self.get_job_details(job_link)
+        except Exception as e:
+            logger.exception(f"Erro ao extrair detalhes da vaga {job_link}: {e}")
+            return None
+
+    async def iter_job_details(self, links):
+        # Janela deslizante: só algumas extrações ficam em andamento, então a memória não
+        # cresce com o número de vagas; o pool de páginas e o limite por domínio continuam
+        # controlando quantas rodam de fato em paralelo
+        links = iter(links)
+        pending = set()
+        try:
+            while True:
+                for link in links:
+                    pending.add(asyncio.create_task(self._safe_job_details(link)))
+                    if len(pending) >= self.in_flight:
+                        break
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    job_data = task.result()
+                    if job_data:
+                        yield job_data
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def close(self):
+        if self.stats:
+            logger.info(
+                f"Detalhes das vagas: {self.stats['listing']} da listagem, "
+                f"{self.stats['api']} da API, {self.stats['page']} renderizando a página"
+            )
+        await self.pool.close()
@@ -0,0 +1,53 @@
+import importlib
+from ..logger import logger
+from .base import Source, job_record
+from .linkedin import LinkedinSource
+from .meu_padrinho import MeuPadrinhoSource
+
+SOURCE_TYPES = {cls.source: cls for cls in (MeuPadrinhoSource, LinkedinSource)}
+
+# Usado quando não há sources.yaml nem sources.yaml.example
+DEFAULT_SOURCES = {
+	"meu-padrinho": {},
+	"linkedin": {"environments": ["dev"]},
+}
+
+
+def register_source(cls):
+	SOURCE_TYPES[cls.source] = cls
+	return cls
+
+
+def _source_class(source_type):
+	if source_type in SOURCE_TYPES:
+		return SOURCE_TYPES[source_type]
+
+	# Fontes de fora do projeto: "pacote.modulo:Classe"
+	if ":" in source_type:
+		module, name = source_type.split(":", 1)
+		return getattr(importlib.import_module(module), name)
+
+	raise ValueError(f"Tipo de fonte desconhecido: {source_type}")
+
+
+def load_sources(settings, storage, environment):
+	sources = []
+	for name, options in (settings or DEFAULT_SOURCES).items():
+		options = dict(options or {})
+		enabled = options.pop("enabled", True)
+		source_type = options.pop("type", name)
+
+		try:
+			source = _source_class(source_type)(storage, name=name, **options)
+		except Exception as e:
+			logger.error(f"Fonte '{name}' ignorada: configuração inválida no sources.yaml ({e})")
+			continue
+
+		if not enabled or not source.enabled_in(environment):
+			logger.info(f"Fonte '{name}' desativada")
+			continue
+		sources.append(source)
+
+	logger.info(f"Fontes ativas: {', '.join(source.name for source in sources) or 'nenhuma'}")
+	return sources
+
@@ -0,0 +1,47 @@
+
+def job_record(source, link, description, title="", company="", subscription_link=None):
+	# Formato único que o pipeline, o avaliador e o Storage esperam de qualquer fonte
+	return {
+		"source": source,
+		"title": title or "",
+		"company": company or "",
+		"description": description or "",
+		"link": link,
+		"subscription_link": subscription_link,
+	}
+
+
+class Source:
+	# Valor gravado em jobs.source; o nome da instância vem da chave no sources.yaml
+	source = None
+
+	def __init__(self, storage, name=None, interval=None, environments=None, scraper=None):
+		self.storage = storage
+		self.name = name or self.source
+		self.interval = interval or self.default_interval()
+		self.environments = environments
+		self.scraper_options = scraper or {}
+
+	def default_interval(self):
+		return 60
+
+	def enabled_in(self, environment):
+		return not self.environments or environment in self.environments
+
+	def partitions(self):
+		# Partes agendadas separadamente no daemon (ex: uma por busca do Linkedin)
+		return [None]
+
+	async def new_context(self, browser, blocker):
+		context = await browser.new_context()
+		await blocker.install(context)
+		return context
+
+	def commit(self):
+		# Chamado depois que o pipeline gravou tudo o que records() produziu; é onde as
+		# fontes avançam suas marcas d'água, para não pular vagas que falharam
+		pass
+
+	def records(self, context, partition=None, backfill=False):
+		# Gerador assíncrono de job_record(); deve produzir cada vaga assim que ela é coletada
+		raise NotImplementedError
@@ -0,0 +1,69 @@
+import os
+from ..config import config
+from ..linkedin_scraper import LinkedinScraper
+from ..logger import logger
+from .base import Source, job_record
+
+DEFAULT_QUERIES = [
+	'("vue" OR "vue.js" OR vuejs) AND vaga',
+	'("frontend" OR "front end" OR "front-end") AND vaga',
+	'("vue" OR "vue.js" OR vuejs) AND latam',
+	'(vue OR vue.js OR vuejs) AND "remote" AND brazil',
+	'(vue OR vue.js OR vuejs) AND "remote" AND latam',
+	'(vue OR vue.js OR vuejs) AND "remote"',
+]
+
+
+class LinkedinSource(Source):
+	source = "linkedin"
+
+	def __init__(self, storage, queries=None, **options):
+		super().__init__(storage, **options)
+		self.queries = list(queries or DEFAULT_QUERIES)
+		self._scrapers = []
+
+	def default_interval(self):
+		return config.daemon_linkedin_interval
+
+	def partitions(self):
+		# No daemon cada busca roda separada, espalhada ao longo do intervalo
+		return self.queries
+
+	async def new_context(self, browser, blocker):
+		session_path = self.scraper_options.get("session_path", config.linkedin_session_path)
+		context = await browser.new_context(
+			viewport={'width': 1920, 'height': 1080},
+			storage_state=session_path if os.path.exists(session_path) else None,
+		)
+		await blocker.install(context)
+		return context
+
+	def commit(self):
+		for linkedin_scraper in self._scrapers:
+			linkedin_scraper.commit_watermarks()
+		self._scrapers.clear()
+
+	async def records(self, context, partition=None, backfill=False):
+		logger.info("Iniciando busca no Linkedin...")
+		linkedin_scraper = LinkedinScraper(
+			await context.new_page(),
+			[partition] if partition else self.queries,
+			storage=self.storage,
+			**{
+				"session_path": config.linkedin_session_path,
+				"stop_after_seen": config.linkedin_stop_after_seen,
+				"max_scrolls": config.linkedin_max_scrolls,
+				"tabs": config.linkedin_tabs,
+				"jitter_s": (config.linkedin_jitter_min, config.linkedin_jitter_max),
+				"base_url": config.linkedin_url,
+				**self.scraper_options,
+			},
+		)
+
+		self._scrapers.append(linkedin_scraper)
+
+		try:
+			async for post in linkedin_scraper.iter_job_posts():
+				yield job_record(self.source, post["link"], post["text"], subscription_link=post["link"])
+		finally:
+			logger.info("Busca no Linkedin finalizada")
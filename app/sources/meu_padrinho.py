@@ -0,0 +1,90 @@
+import json
+from ..config import config
+from ..logger import logger
+from ..scraper import Scraper
+from .base import Source, job_record
+
+DEFAULT_FILTERS = {
+	"termoBusca": "",
+	"cargos": ["frontend"],
+	"formasTrabalho": [],
+	"niveis": [],
+	"plataformas": [],
+	"vagaEasyApply": False,
+	"vagaVerificadaPorIa": False,
+	"tiposContratacao": [],
+	"apenasComRecrutador": False,
+	"comEmailDeContato": False,
+}
+
+
+class MeuPadrinhoSource(Source):
+	source = "meu-padrinho"
+
+	def __init__(self, storage, filters=None, **options):
+		super().__init__(storage, **options)
+		self.filters = dict(DEFAULT_FILTERS, **(filters or {}))
+		self._scrapers = []
+
+	def default_interval(self):
+		return config.daemon_meu_padrinho_interval
+
+	async def new_context(self, browser, blocker):
+		# Os filtros da busca ficam no localStorage do site
+		storage_state = {
+			"cookies": [],
+			"origins": [{
+				"origin": self.scraper_options.get("base_url", config.meu_padrinho_url),
+				"localStorage": [{
+					"name": "job_filters",
+					"value": json.dumps(self.filters, ensure_ascii=False)
+				}]
+			}]
+		}
+
+		context = await browser.new_context(storage_state=storage_state)
+		await blocker.install(context)
+		return context
+
+	def commit(self):
+		for scraper in self._scrapers:
+			scraper.commit_watermark()
+		self._scrapers.clear()
+
+	async def records(self, context, partition=None, backfill=False):
+		scraper = Scraper(context, storage=self.storage, **{
+			"pages": config.scraper_pages,
+			"max_per_domain": config.scraper_domain_concurrency,
+			"delay_s": config.scraper_delay,
+			"use_api": config.scraper_use_api,
+			"stop_after_seen": config.scraper_stop_after_seen,
+			"max_pages": config.scraper_max_pages,
+			"base_url": config.meu_padrinho_url,
+			**self.scraper_options,
+		})
+
+		self._scrapers.append(scraper)
+
+		try:
+			links = await scraper.get_job_links(backfill=backfill)
+
+			if not links:
+				logger.warning("Nenhuma vaga encontrada nesta execução")
+				return
+
+			links = self.storage.filter_unvisited(links)
+			logger.info(f"{len(links)} vagas novas para analisar")
+
+			async for job_data in scraper.iter_job_details(links):
+				logger.info(f"Analisando vaga: {job_data['link']} | Título: {job_data['title']}")
+				yield job_record(
+					self.source,
+					job_data["link"],
+					job_data["description"],
+					title=job_data["title"],
+					company=job_data["company"],
+					subscription_link=job_data["subscription_link"],
+				)
+		finally:
+			logger.info("Fechando páginas da busca MP...")
+			await scraper.close()
@@ -1,23 +1,129 @@
+import base64
+import hashlib
 import sqlite3
-from datetime import datetime
+import threading
+import zlib
+from datetime import datetime, timedelta
+from .cache import normalize_text
 from .logger import logger
 import os
 import json
 
+# Texto comprimido é gravado como BLOB; o que ficou como TEXT continua legível direto no sqlite3.
+# Os triggers do FTS chamam decompress(), então quem gravar em jobs fora daqui precisa registrar
+# essa função na conexão (ver "Acesso direto ao jobs.db" no README)
+def _compress(text, min_bytes):
+	if text is None or not min_bytes:
+		return text
+	data = text.encode("utf-8")
+	if len(data) < min_bytes:
+		return text
+	compressed = zlib.compress(data, 6)
+	return compressed if len(compressed) < len(data) else text
+
+def _decompress(value):
+	if isinstance(value, bytes):
+		return zlib.decompress(value).decode("utf-8")
+	return value
+
+def _content_hash(text):
+	text = normalize_text(text or "")
+	if not text:
+		return None
+	return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 class Storage:
-	def __init__(self, db_path="data/jobs.db"):
+	# Limite de parâmetros por consulta, abaixo do SQLITE_MAX_VARIABLE_NUMBER das versões antigas
+	QUERY_CHUNK_SIZE = 900
+	COMPACT_BATCH_SIZE = 500
+	ORDERS = {
+		"recent": "visited_at",
+		"score": "evaluation_score",
+	}
+
+	def __init__(self, db_path="data/jobs.db", compress_min_bytes=512, read_only=False, query_only=False):
 		self.db_path = db_path
+		self.compress_min_bytes = compress_min_bytes
+		# Em modo somente leitura (--dry-run) vagas e marcas d'água não são gravadas
+		self.read_only = read_only or query_only
+
+		# Uma única conexão compartilhada; o lock serializa o acesso entre threads
+		self._lock = threading.RLock()
+
+		if query_only:
+			# Comandos de consulta: abre o banco existente só para leitura, sem manutenção do
+			# esquema e sem carregar os links conhecidos, que só servem para a busca de vagas
+			self._conn = self._connect_query_only()
+			self.fts_enabled = self._has_table("jobs_fts")
+			self._known_links = set()
+			logger.debug(f"Storage aberto para consulta: {self.db_path}")
+			return
 
 		db_dir = os.path.dirname(self.db_path)
 		if db_dir:
 			os.makedirs(db_dir, exist_ok=True)
 
+		self._conn = self._connect()
 		self._init_db()
-		logger.info(f"Storage inicializado: {self.db_path}")
+		self._known_links = self._load_known_links()
+		logger.info(f"Storage inicializado: {self.db_path} ({len(self._known_links)} vagas conhecidas)")
+
+	def _connect(self):
+		conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+		# Em banco novo vale na hora (precisa vir antes do WAL); nos antigos só depois do VACUUM do compact()
+		conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		conn.execute("PRAGMA temp_store=MEMORY")
+		conn.execute("PRAGMA cache_size=-16000")
+		conn.execute("PRAGMA mmap_size=67108864")
+		conn.execute("PRAGMA busy_timeout=30000")
+		# O INSERT OR REPLACE só dispara o trigger de DELETE (que atualiza o FTS) com isso ligado
+		conn.execute("PRAGMA recursive_triggers=ON")
+		# Usada pelos triggers do FTS; quem alterar a tabela jobs por fora precisa registrá-la também
+		conn.create_function("decompress", 1, _decompress, deterministic=True)
+		return conn
+
+	def _connect_query_only(self):
+		conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False, timeout=30)
+		conn.execute("PRAGMA query_only=ON")
+		conn.execute("PRAGMA temp_store=MEMORY")
+		conn.execute("PRAGMA cache_size=-16000")
+		conn.execute("PRAGMA mmap_size=67108864")
+		conn.execute("PRAGMA busy_timeout=30000")
+		conn.create_function("decompress", 1, _decompress, deterministic=True)
+		return conn
+
+	def _has_table(self, name):
+		with self._lock:
+			return self._conn.execute(
+				"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+			).fetchone() is not None
+
+	def _enable_incremental_vacuum(self):
+		# auto_vacuum só muda em banco vazio ou depois de um VACUUM completo, feito uma única vez
+		# pela compactação: o VACUUM reescreve o arquivo todo e falha se outro processo estiver usando o banco
+		with self._lock:
+			if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+				return
+			logger.info("Ativando vacuum incremental no banco (executado só uma vez)...")
+			self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+			try:
+				self._conn.execute("VACUUM")
+			except sqlite3.OperationalError as e:
+				logger.warning(f"Vacuum incremental não ativado, banco em uso; tenta de novo na próxima compactação ({e})")
+
+	def _db_size(self):
+		# Com WAL, as páginas recém-gravadas ficam no -wal até o checkpoint
+		return sum(os.path.getsize(path) for path in (self.db_path, f"{self.db_path}-wal") if os.path.exists(path))
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
 
 	def _init_db(self):
 		try:
-			with sqlite3.connect(self.db_path) as conn:
+			with self._lock, self._conn as conn:
 				conn.execute("""
 					CREATE TABLE IF NOT EXISTS jobs (
 						id TEXT PRIMARY KEY,
@@ -34,28 +140,361 @@ class Storage:
 						notified INTEGER DEFAULT 0
 					)
 				""")
+				columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+				if "fingerprint" not in columns:
+					conn.execute("ALTER TABLE jobs ADD COLUMN fingerprint TEXT")
+				conn.execute("""
+					CREATE TABLE IF NOT EXISTS crawl_state (
+						source TEXT,
+						key TEXT,
+						value TEXT,
+						updated_at TEXT,
+						PRIMARY KEY (source, key)
+					)
+				""")
+				conn.execute("""
+					CREATE TABLE IF NOT EXISTS jobs_archive (
+						link TEXT PRIMARY KEY,
+						source TEXT,
+						content_hash TEXT,
+						evaluation_score REAL,
+						visited_at TEXT,
+						archived_at TEXT
+					)
+				""")
+				conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_archive_hash ON jobs_archive (content_hash)")
+				conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_visited_at ON jobs (visited_at)")
+				conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_score ON jobs (evaluation_score)")
+				conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_source ON jobs (source, visited_at)")
+				conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_decision ON jobs (decision, visited_at)")
+			self.fts_enabled = self._init_fts()
 			logger.debug("Tabela 'jobs' verificada/criada com sucesso")
 		except Exception:
 			logger.exception("Erro ao inicializar banco de dados")
 			raise
 
+	def _init_fts(self):
+		try:
+			with self._lock, self._conn as conn:
+				exists = conn.execute(
+					"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+				).fetchone()
+				conn.execute("""
+					CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+						title, company, description,
+						content='jobs', content_rowid='rowid',
+						tokenize='unicode61 remove_diacritics 2'
+					)
+				""")
+				# Recriados a cada início: a descrição pode estar comprimida, então o índice lê decompress()
+				for name, event, body in (
+					("jobs_fts_insert", "INSERT ON jobs", """
+						INSERT INTO jobs_fts (rowid, title, company, description)
+						VALUES (new.rowid, new.title, new.company, decompress(new.description));
+					"""),
+					("jobs_fts_delete", "DELETE ON jobs", """
+						INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description)
+						VALUES ('delete', old.rowid, old.title, old.company, decompress(old.description));
+					"""),
+					# Regravar só a avaliação não mexe no índice
+					("jobs_fts_update", """
+						UPDATE OF title, company, description ON jobs
+						WHEN old.title IS NOT new.title OR old.company IS NOT new.company
+							OR old.description IS NOT new.description
+					""", """
+						INSERT INTO jobs_fts (jobs_fts, rowid, title, company, description)
+						VALUES ('delete', old.rowid, old.title, old.company, decompress(old.description));
+						INSERT INTO jobs_fts (rowid, title, company, description)
+						VALUES (new.rowid, new.title, new.company, decompress(new.description));
+					"""),
+				):
+					conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+					conn.execute(f"CREATE TRIGGER {name} AFTER {event} BEGIN {body} END")
+				if not exists:
+					# Bancos antigos: indexa as vagas que já estavam gravadas. O 'rebuild' do FTS5
+					# leria a coluna comprimida, por isso a carga é feita à mão
+					conn.execute("""
+						INSERT INTO jobs_fts (rowid, title, company, description)
+						SELECT rowid, title, company, decompress(description) FROM jobs
+					""")
+			return True
+		except sqlite3.OperationalError as e:
+			logger.warning(f"FTS5 indisponível, a busca por texto usará LIKE: {e}")
+			return False
+
+	def _load_known_links(self):
+		with self._lock:
+			return {
+				row[0] for row in self._conn.execute("SELECT link FROM jobs UNION ALL SELECT link FROM jobs_archive")
+			}
+
 	def is_visited(self, link):
+		result = not self.filter_unvisited([link])
+		logger.debug(f"Vaga {'já visitada' if result else 'nova'}: {link}")
+		return result
+
+	def filter_unvisited(self, links):
+		# O conjunto em memória responde os links conhecidos; o banco só confirma os
+		# que sobraram, caso outro processo tenha gravado depois da carga inicial
+		candidates = list(dict.fromkeys(link for link in links if link and link not in self._known_links))
+		if not candidates:
+			return []
+
+		found = set()
 		try:
-			with sqlite3.connect(self.db_path) as conn:
-				cur = conn.execute("SELECT 1 FROM jobs WHERE link = ?", (link,))
-				result = cur.fetchone() is not None
-				logger.debug(f"Vaga {'já visitada' if result else 'nova'}: {link}")
-				return result
+			with self._lock:
+				for i in range(0, len(candidates), self.QUERY_CHUNK_SIZE):
+					chunk = candidates[i:i + self.QUERY_CHUNK_SIZE]
+					placeholders = ", ".join("?" * len(chunk))
+					# Vagas arquivadas continuam contando como vistas
+					for table in ("jobs", "jobs_archive"):
+						cur = self._conn.execute(f"SELECT link FROM {table} WHERE link IN ({placeholders})", chunk)
+						found.update(row[0] for row in cur)
 		except Exception:
-			logger.exception(f"Erro ao verificar se vaga foi visitada: {link}")
-			return False
+			logger.exception("Erro ao verificar vagas visitadas")
+			return candidates
 
-	def save_job(self, job_data, source="meu-padrinho"):
-		eval_data = job_data.get("evaluation", {})
+		self._known_links.update(found)
+		return [link for link in candidates if link not in found]
 
+	def get_watermark(self, source, key=""):
 		try:
-			with sqlite3.connect(self.db_path) as conn:
+			with self._lock:
+				row = self._conn.execute(
+					"SELECT value FROM crawl_state WHERE source = ? AND key = ?", (source, key)
+				).fetchone()
+				return row[0] if row else None
+		except Exception:
+			logger.exception(f"Erro ao ler marca d'água: {source}/{key}")
+			return None
+
+	def get_watermarks(self, source):
+		with self._lock:
+			return dict(self._conn.execute(
+				"SELECT key, value FROM crawl_state WHERE source = ? ORDER BY updated_at", (source,)
+			).fetchall())
+
+	def delete_watermark(self, source, key):
+		if self.read_only:
+			return
+		with self._lock, self._conn as conn:
+			conn.execute("DELETE FROM crawl_state WHERE source = ? AND key = ?", (source, key))
+
+	def set_watermark(self, source, key, value):
+		if self.read_only:
+			logger.debug(f"Somente leitura: marca d'água não gravada ({source}/{key}={value})")
+			return
+		try:
+			with self._lock, self._conn as conn:
 				conn.execute("""
+					INSERT OR REPLACE INTO crawl_state (source, key, value, updated_at)
+					VALUES (?, ?, ?, ?)
+				""", (source, key, value, datetime.utcnow().isoformat()))
+		except Exception:
+			logger.exception(f"Erro ao gravar marca d'água: {source}/{key}")
+
+	def _row_dict(self, cursor, row):
+		job = {column[0]: value for column, value in zip(cursor.description, row)}
+		if "description" in job:
+			job["description"] = _decompress(job["description"])
+		if job.get("evaluation"):
+			job["evaluation"] = json.loads(_decompress(job["evaluation"]))
+		return job
+
+	@staticmethod
+	def _encode_cursor(value, rowid):
+		return base64.urlsafe_b64encode(json.dumps([value, rowid]).encode("utf-8")).decode("ascii")
+
+	@staticmethod
+	def _decode_cursor(cursor):
+		try:
+			value, rowid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+			return value, int(rowid)
+		except (ValueError, TypeError):
+			raise ValueError(f"Cursor inválido: {cursor}")
+
+	@staticmethod
+	def _fts_query(text):
+		# Cada termo vira uma frase entre aspas; assim "vue.js" ou "c++" não quebram a sintaxe do FTS5
+		terms = text.split()
+		return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+	def query_jobs(self, text=None, source=None, min_score=None, decision=None, since=None,
+			order="recent", limit=20, cursor=None):
+		if order not in self.ORDERS:
+			raise ValueError(f"Ordenação inválida: {order}")
+		column = self.ORDERS[order]
+
+		conditions = [f"{column} IS NOT NULL"]
+		params = []
+		if text and text.strip():
+			if self.fts_enabled:
+				conditions.append("rowid IN (SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ?)")
+				params.append(self._fts_query(text))
+			else:
+				for term in text.split():
+					conditions.append("(title LIKE ? OR company LIKE ? OR decompress(description) LIKE ?)")
+					params += [f"%{term}%"] * 3
+		if source:
+			conditions.append("source = ?")
+			params.append(source)
+		if min_score is not None:
+			conditions.append("evaluation_score >= ?")
+			params.append(min_score)
+		if decision:
+			conditions.append("decision = ?")
+			params.append(decision)
+		if since:
+			conditions.append("visited_at >= ?")
+			params.append(since)
+		if cursor:
+			# Paginação por chave: continua depois da última linha da página anterior, sem OFFSET
+			conditions.append(f"({column}, rowid) < (?, ?)")
+			params += list(self._decode_cursor(cursor))
+
+		query = f"""
+			SELECT rowid, link, source, title, company, evaluation_score, decision, visited_at
+			FROM jobs WHERE {' AND '.join(conditions)}
+			ORDER BY {column} DESC, rowid DESC
+		"""
+		if limit:
+			query += " LIMIT ?"
+			params.append(limit + 1)
+
+		with self._lock:
+			db_cursor = self._conn.execute(query, params)
+			jobs = [self._row_dict(db_cursor, row) for row in db_cursor.fetchall()]
+
+		next_cursor = None
+		if limit and len(jobs) > limit:
+			jobs = jobs[:limit]
+			next_cursor = self._encode_cursor(jobs[-1][column], jobs[-1]["rowid"])
+		for job in jobs:
+			del job["rowid"]
+		return jobs, next_cursor
+
+	def find_archived(self, text):
+		# Vaga republicada com outro link e o mesmo texto de uma arquivada: (link, score) da arquivada
+		content_hash = _content_hash(text)
+		if not content_hash:
+			return None
+		try:
+			with self._lock:
+				return self._conn.execute(
+					"SELECT link, evaluation_score FROM jobs_archive WHERE content_hash = ? LIMIT 1", (content_hash,)
+				).fetchone()
+		except Exception:
+			logger.exception("Erro ao consultar vagas arquivadas")
+			return None
+
+	def get_job(self, link):
+		with self._lock:
+			cursor = self._conn.execute("SELECT * FROM jobs WHERE link = ? OR id = ?", (link, link))
+			row = cursor.fetchone()
+			if not row:
+				cursor = self._conn.execute("SELECT *, 1 AS archived FROM jobs_archive WHERE link = ?", (link,))
+				row = cursor.fetchone()
+			return self._row_dict(cursor, row) if row else None
+
+	def iter_jobs(self, source=None, limit=None, stale_fingerprint=None):
+		# Lê em blocos pela rowid, sem segurar o lock entre um bloco e outro; como a reavaliação
+		# grava por UPDATE, a rowid não muda e a varredura continua de onde parou
+		conditions = ["rowid > ?"]
+		params = []
+		if source:
+			conditions.append("source = ?")
+			params.append(source)
+		if stale_fingerprint:
+			conditions.append("fingerprint IS NOT ?")
+			params.append(stale_fingerprint)
+
+		query = f"""
+			SELECT rowid, source, title, company, description, link, subscription_link, evaluation_score
+			FROM jobs WHERE {' AND '.join(conditions)}
+			ORDER BY rowid LIMIT ?
+		"""
+		last_rowid = 0
+		remaining = limit
+		while remaining is None or remaining > 0:
+			size = self.COMPACT_BATCH_SIZE if remaining is None else min(self.COMPACT_BATCH_SIZE, remaining)
+			with self._lock:
+				cursor = self._conn.execute(query, [last_rowid] + params + [size])
+				jobs = [self._row_dict(cursor, row) for row in cursor.fetchall()]
+			if not jobs:
+				return
+
+			last_rowid = jobs[-1]["rowid"]
+			for job in jobs:
+				del job["rowid"]
+				yield job
+			if remaining is not None:
+				remaining -= len(jobs)
+
+	def count_stale(self, fingerprint, source=None):
+		query = "SELECT source, COUNT(*) FROM jobs WHERE fingerprint IS NOT ?"
+		params = [fingerprint]
+		if source:
+			query += " AND source = ?"
+			params.append(source)
+		with self._lock:
+			return dict(self._conn.execute(query + " GROUP BY source", params).fetchall())
+
+	def stats(self):
+		with self._lock:
+			by_source = self._conn.execute("""
+				SELECT source, COUNT(*), AVG(evaluation_score), MAX(visited_at)
+				FROM jobs GROUP BY source ORDER BY source
+			""").fetchall()
+			by_decision = self._conn.execute("""
+				SELECT COALESCE(decision, '-'), COUNT(*) FROM jobs GROUP BY decision ORDER BY COUNT(*) DESC
+			""").fetchall()
+			archived = self._conn.execute("SELECT COUNT(*) FROM jobs_archive").fetchone()[0]
+
+		return {
+			"total": sum(row[1] for row in by_source),
+			"sources": [
+				{"source": source, "jobs": count, "avg_score": avg, "last_visited_at": last}
+				for source, count, avg, last in by_source
+			],
+			"decisions": dict(by_decision),
+			"archived": archived,
+			"db_size_bytes": self._db_size(),
+		}
+
+	def _job_row(self, job_data, source):
+		eval_data = job_data.get("evaluation", {})
+		return (
+			job_data.get('link'),
+			source,
+			job_data.get('title'),
+			job_data.get('link'),
+			job_data.get('subscription_link'),
+			job_data.get('company'),
+			_compress(job_data.get('description'), self.compress_min_bytes),
+			_compress(json.dumps(eval_data, ensure_ascii=False), self.compress_min_bytes),
+			eval_data.get('score'),
+			eval_data.get('decision'),
+			datetime.utcnow().isoformat(),
+			0,
+			job_data.get('fingerprint'),
+		)
+
+	def save_job(self, job_data, source="meu-padrinho"):
+		self.save_jobs([dict(job_data, source=source)])
+
+	def save_jobs(self, jobs, source="meu-padrinho"):
+		if not jobs:
+			return
+		if self.read_only:
+			logger.info(f"Somente leitura: {len(jobs)} vagas não foram gravadas")
+			return
+
+		rows = [self._job_row(job_data, job_data.get("source", source)) for job_data in jobs]
+
+		try:
+			# Todas as vagas do lote entram numa única transação
+			with self._lock, self._conn as conn:
+				conn.executemany("""
 					INSERT OR REPLACE INTO jobs (
 						id,
 						source,
@@ -68,30 +507,162 @@ class Storage:
 						evaluation_score,
 						decision,
 						visited_at,
-						notified
+						notified,
+						fingerprint
 					)
-					VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-				""", (
-					job_data.get('link'),
-					source,
-					job_data.get('title'),
-					job_data.get('link'),
-					job_data.get('subscription_link'),
-					job_data.get('company'),
-					job_data.get('description'),
-					json.dumps(eval_data, ensure_ascii=False),
-					eval_data.get('score'),
-					eval_data.get('decision'),
-					datetime.utcnow().isoformat(),
-					0
-				))
-				conn.commit()
-
-			logger.info(
-				f"Vaga salva: {job_data.get('title')} "
-				f"(score={eval_data.get('score')}, decision={eval_data.get('decision')})"
-			)
+					VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+				""", rows)
+
+			self._known_links.update(row[3] for row in rows if row[3])
+
+			for job_data in jobs:
+				eval_data = job_data.get("evaluation", {})
+				logger.info(
+					f"Vaga salva: {job_data.get('title')} "
+					f"(score={eval_data.get('score')}, decision={eval_data.get('decision')})"
+				)
 
 		except Exception:
-			logger.exception("Erro ao salvar vaga no banco")
+			logger.exception("Erro ao salvar vagas no banco")
 			raise
+
+	def update_evaluations(self, jobs):
+		# Reavaliação: troca só a avaliação, mantendo visited_at e o estado de notificação
+		if not jobs:
+			return
+		if self.read_only:
+			logger.info(f"Somente leitura: {len(jobs)} avaliações não foram gravadas")
+			return
+
+		rows = []
+		for job_data in jobs:
+			eval_data = job_data.get("evaluation", {})
+			rows.append((
+				job_data.get("title"),
+				job_data.get("company"),
+				_compress(json.dumps(eval_data, ensure_ascii=False), self.compress_min_bytes),
+				eval_data.get("score"),
+				eval_data.get("decision"),
+				job_data.get("fingerprint"),
+				job_data.get("link"),
+			))
+
+		try:
+			with self._lock, self._conn as conn:
+				conn.executemany("""
+					UPDATE jobs
+					SET title = ?, company = ?, evaluation = ?, evaluation_score = ?, decision = ?, fingerprint = ?
+					WHERE link = ?
+				""", rows)
+		except Exception:
+			logger.exception("Erro ao atualizar avaliações no banco")
+			raise
+
+	def archive_jobs(self, older_than_days=None, below_score=None):
+		# Move para jobs_archive só o necessário para não revisitar a vaga: link e hash do conteúdo
+		conditions = []
+		params = []
+		if older_than_days:
+			conditions.append("visited_at < ?")
+			params.append((datetime.utcnow() - timedelta(days=older_than_days)).isoformat())
+		if below_score:
+			conditions.append("evaluation_score < ?")
+			params.append(below_score)
+		if not conditions:
+			return 0
+
+		archived = 0
+		while True:
+			# Lotes pequenos para não segurar o lock enquanto o pipeline grava
+			with self._lock, self._conn as conn:
+				rows = conn.execute(f"""
+					SELECT link, source, decompress(description), evaluation_score, visited_at
+					FROM jobs WHERE {' OR '.join(conditions)} LIMIT ?
+				""", params + [self.COMPACT_BATCH_SIZE]).fetchall()
+				if not rows:
+					break
+
+				now = datetime.utcnow().isoformat()
+				conn.executemany("""
+					INSERT OR REPLACE INTO jobs_archive (link, source, content_hash, evaluation_score, visited_at, archived_at)
+					VALUES (?, ?, ?, ?, ?, ?)
+				""", [
+					(link, source, _content_hash(description), score, visited_at, now)
+					for link, source, description, score, visited_at in rows
+				])
+				conn.executemany("DELETE FROM jobs WHERE link = ?", [(row[0],) for row in rows])
+			archived += len(rows)
+
+		return archived
+
+	def compress_existing(self):
+		# Comprime as linhas gravadas antes da compressão; a marca d'água evita varrer a tabela toda de novo
+		if not self.compress_min_bytes:
+			return 0
+
+		last_rowid = int(self.get_watermark("storage", "compressed_rowid") or 0)
+		compressed = 0
+		while True:
+			with self._lock, self._conn as conn:
+				rows = conn.execute("""
+					SELECT rowid, description, evaluation FROM jobs
+					WHERE rowid > ? ORDER BY rowid LIMIT ?
+				""", (last_rowid, self.COMPACT_BATCH_SIZE)).fetchall()
+				if not rows:
+					break
+
+				updates = []
+				for rowid, description, evaluation in rows:
+					new_description = description if isinstance(description, bytes) else _compress(description, self.compress_min_bytes)
+					new_evaluation = evaluation if isinstance(evaluation, bytes) else _compress(evaluation, self.compress_min_bytes)
+					if new_description is not description or new_evaluation is not evaluation:
+						updates.append((new_description, new_evaluation, rowid))
+				conn.executemany("UPDATE jobs SET description = ?, evaluation = ? WHERE rowid = ?", updates)
+			compressed += len(updates)
+			last_rowid = rows[-1][0]
+
+		self.set_watermark("storage", "compressed_rowid", str(last_rowid))
+		return compressed
+
+	def vacuum(self):
+		with self._lock:
+			free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+			# O pragma devolve uma linha por página liberada; sem consumir tudo ele para na primeira
+			self._conn.execute("PRAGMA incremental_vacuum").fetchall()
+			self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+			self._conn.execute("PRAGMA optimize")
+		return free_pages
+
+	def compact(self, retention_days=None, min_score=None):
+		if self.read_only:
+			return None
+		try:
+			size_before = self._db_size()
+			self._enable_incremental_vacuum()
+			archived = self.archive_jobs(older_than_days=retention_days, below_score=min_score)
+			compressed = self.compress_existing()
+			free_pages = self.vacuum()
+			self.set_watermark("storage", "compacted_at", datetime.utcnow().isoformat())
+		except Exception:
+			logger.exception("Erro ao compactar o banco")
+			return None
+
+		stats = {
+			"archived": archived,
+			"compressed": compressed,
+			"freed_pages": free_pages,
+			"size_before_bytes": size_before,
+			"size_after_bytes": self._db_size(),
+		}
+		logger.info(
+			f"Banco compactado: {archived} vagas arquivadas, {compressed} comprimidas, "
+			f"{free_pages} páginas liberadas ({size_before / 1024 / 1024:.1f} MB -> "
+			f"{stats['size_after_bytes'] / 1024 / 1024:.1f} MB)"
+		)
+		return stats
+
+	def compaction_due(self, interval_hours):
+		last = self.get_watermark("storage", "compacted_at")
+		if not last:
+			return True
+		return datetime.utcnow() - datetime.fromisoformat(last) >= timedelta(hours=interval_hours)
@@ -0,0 +1,303 @@
+import json
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing, contextmanager
+from datetime import datetime
+from .logger import logger
+
+# Preço em USD por 1M de tokens (entrada, saída); LLM_PRICES no .env sobrescreve/complementa
+MODEL_PRICES = {
+	"gpt-4o-mini": (0.15, 0.60),
+	"gpt-4o": (2.50, 10.00),
+	"gpt-4.1-mini": (0.40, 1.60),
+	"gpt-4.1": (2.00, 8.00),
+	"claude-3-5-sonnet": (3.00, 15.00),
+}
+
+
+def _percentile(ordered, fraction):
+	return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Telemetry:
+	ROLLING_RUNS = 20
+
+	def __init__(self):
+		self.db_path = None
+		self.textfile_path = None
+		self.prices = dict(MODEL_PRICES)
+		self._lock = threading.Lock()
+		self._reset()
+
+	def _reset(self):
+		self.run_id = None
+		self.command = None
+		self.started_at = None
+		self._started = None
+		self._durations = defaultdict(list)
+		self._usage = defaultdict(lambda: [0, 0, 0])
+
+	def configure(self, db_path, textfile_path=None, prices=None):
+		self.db_path = db_path
+		self.textfile_path = textfile_path or None
+		self.prices.update({model: tuple(price) for model, price in (prices or {}).items()})
+		if self.db_path:
+			self._init_db()
+
+	@contextmanager
+	def _connect(self, read_only=False):
+		# O "with" da conexão só faz commit; closing() garante que ela seja fechada
+		target, uri = (f"file:{self.db_path}?mode=ro", True) if read_only else (self.db_path, False)
+		with closing(sqlite3.connect(target, uri=uri, timeout=30)) as conn, conn:
+			conn.execute("PRAGMA busy_timeout=30000")
+			yield conn
+
+	def _init_db(self):
+		with self._connect() as conn:
+			conn.execute("""
+				CREATE TABLE IF NOT EXISTS runs (
+					id INTEGER PRIMARY KEY AUTOINCREMENT,
+					command TEXT,
+					started_at TEXT,
+					duration_s REAL,
+					queued INTEGER,
+					evaluated INTEGER,
+					saved INTEGER,
+					failed INTEGER,
+					llm_calls INTEGER,
+					prompt_tokens INTEGER,
+					completion_tokens INTEGER,
+					cost_usd REAL
+				)
+			""")
+			conn.execute("""
+				CREATE TABLE IF NOT EXISTS stage_timings (
+					run_id INTEGER,
+					stage TEXT,
+					count INTEGER,
+					total_s REAL,
+					p50_ms REAL,
+					p95_ms REAL,
+					max_ms REAL,
+					PRIMARY KEY (run_id, stage)
+				)
+			""")
+
+	def start_run(self, command):
+		with self._lock:
+			self._reset()
+			self.command = command
+			self.started_at = datetime.utcnow().isoformat()
+			self._started = time.perf_counter()
+
+	@contextmanager
+	def span(self, stage):
+		started = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.record(stage, time.perf_counter() - started)
+
+	def timed(self, stage, fn):
+		def wrapper(*args, **kwargs):
+			with self.span(stage):
+				return fn(*args, **kwargs)
+		return wrapper
+
+	def record(self, stage, duration_s):
+		with self._lock:
+			self._durations[stage].append(duration_s)
+
+	def record_usage(self, model, prompt_tokens, completion_tokens):
+		with self._lock:
+			usage = self._usage[model]
+			usage[0] += 1
+			usage[1] += prompt_tokens or 0
+			usage[2] += completion_tokens or 0
+
+	def cost(self, model, prompt_tokens, completion_tokens):
+		price = self.prices.get(model)
+		if not price:
+			return 0.0
+		return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+	def stage_summary(self):
+		with self._lock:
+			durations = {stage: sorted(values) for stage, values in self._durations.items()}
+
+		return {
+			stage: {
+				"count": len(values),
+				"total_s": sum(values),
+				"p50_ms": statistics.median(values) * 1000,
+				"p95_ms": _percentile(values, 0.95) * 1000,
+				"max_ms": values[-1] * 1000,
+			}
+			for stage, values in durations.items() if values
+		}
+
+	def finish_run(self, stats=None):
+		if self._started is None:
+			return None
+
+		stats = stats or {}
+		duration_s = time.perf_counter() - self._started
+		stages = self.stage_summary()
+		with self._lock:
+			usage = {model: list(values) for model, values in self._usage.items()}
+
+		llm_calls = sum(u[0] for u in usage.values())
+		prompt_tokens = sum(u[1] for u in usage.values())
+		completion_tokens = sum(u[2] for u in usage.values())
+		cost_usd = sum(self.cost(model, u[1], u[2]) for model, u in usage.items())
+
+		summary = {
+			"command": self.command,
+			"duration_s": duration_s,
+			"stages": stages,
+			"llm_calls": llm_calls,
+			"prompt_tokens": prompt_tokens,
+			"completion_tokens": completion_tokens,
+			"cost_usd": cost_usd,
+			"usage_by_model": usage,
+			**{key: stats.get(key, 0) for key in ("queued", "evaluated", "saved", "failed")},
+		}
+
+		logger.info(
+			f"Telemetria: {duration_s:.1f}s, {llm_calls} chamadas ao LLM, "
+			f"{prompt_tokens}+{completion_tokens} tokens (~US$ {cost_usd:.4f})"
+		)
+		for stage, s in sorted(stages.items()):
+			logger.info(f"  {stage}: n={s['count']} p50={s['p50_ms']:.0f}ms p95={s['p95_ms']:.0f}ms")
+
+		if self.db_path:
+			try:
+				self._save(summary)
+				if self.textfile_path:
+					self._export_textfile(summary)
+			except Exception:
+				logger.exception("Erro ao gravar telemetria da execução")
+
+		self._reset()
+		return summary
+
+	def _save(self, summary):
+		with self._connect() as conn:
+			cursor = conn.execute("""
+				INSERT INTO runs (
+					command, started_at, duration_s, queued, evaluated, saved, failed,
+					llm_calls, prompt_tokens, completion_tokens, cost_usd
+				)
+				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+			""", (
+				summary["command"], self.started_at, summary["duration_s"],
+				summary["queued"], summary["evaluated"], summary["saved"], summary["failed"],
+				summary["llm_calls"], summary["prompt_tokens"], summary["completion_tokens"], summary["cost_usd"],
+			))
+			self.run_id = cursor.lastrowid
+			conn.executemany("""
+				INSERT INTO stage_timings (run_id, stage, count, total_s, p50_ms, p95_ms, max_ms)
+				VALUES (?, ?, ?, ?, ?, ?, ?)
+			""", [
+				(self.run_id, stage, s["count"], s["total_s"], s["p50_ms"], s["p95_ms"], s["max_ms"])
+				for stage, s in summary["stages"].items()
+			])
+
+	def _query(self, sql, params):
+		# Consultas não criam as tabelas: banco sem nenhuma execução gravada devolve vazio
+		try:
+			with self._connect(read_only=True) as conn:
+				cursor = conn.execute(sql, params)
+				columns = [c[0] for c in cursor.description]
+				return columns, cursor.fetchall()
+		except sqlite3.OperationalError as e:
+			if "no such table" not in str(e):
+				raise
+			return [], []
+
+	def recent_runs(self, limit=10):
+		columns, rows = self._query("""
+			SELECT id, command, started_at, duration_s, evaluated, failed, llm_calls,
+				prompt_tokens, completion_tokens, cost_usd
+			FROM runs ORDER BY id DESC LIMIT ?
+		""", (limit,))
+		return [dict(zip(columns, row)) for row in rows]
+
+	def rolling_stages(self, runs=None):
+		# p50/p95 móveis: mediana dos percentis das últimas N execuções de cada estágio
+		_, rows = self._query("""
+			SELECT stage, p50_ms, p95_ms FROM stage_timings
+			WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)
+		""", (runs or self.ROLLING_RUNS,))
+
+		by_stage = defaultdict(lambda: ([], []))
+		for stage, p50, p95 in rows:
+			by_stage[stage][0].append(p50)
+			by_stage[stage][1].append(p95)
+		return {
+			stage: {"p50_ms": statistics.median(p50s), "p95_ms": statistics.median(p95s)}
+			for stage, (p50s, p95s) in by_stage.items()
+		}
+
+	def _export_textfile(self, summary):
+		lines = [
+			"# HELP job_scout_run_duration_seconds Duração da última execução",
+			"# TYPE job_scout_run_duration_seconds gauge",
+			f'job_scout_run_duration_seconds{{command="{summary["command"]}"}} {summary["duration_s"]:.3f}',
+			"# HELP job_scout_jobs Vagas processadas na última execução",
+			"# TYPE job_scout_jobs gauge",
+		]
+		for key in ("queued", "evaluated", "saved", "failed"):
+			lines.append(f'job_scout_jobs{{status="{key}"}} {summary[key]}')
+
+		lines += [
+			"# HELP job_scout_llm_tokens Tokens usados na última execução",
+			"# TYPE job_scout_llm_tokens gauge",
+		]
+		for model, (calls, prompt, completion) in summary["usage_by_model"].items():
+			lines.append(f'job_scout_llm_tokens{{model="{model}",type="prompt"}} {prompt}')
+			lines.append(f'job_scout_llm_tokens{{model="{model}",type="completion"}} {completion}')
+		lines += [
+			"# HELP job_scout_llm_cost_usd Custo estimado da última execução",
+			"# TYPE job_scout_llm_cost_usd gauge",
+			f"job_scout_llm_cost_usd {summary['cost_usd']:.6f}",
+			"# HELP job_scout_stage_latency_ms Latência dos estágios na última execução",
+			"# TYPE job_scout_stage_latency_ms gauge",
+		]
+		for stage, s in summary["stages"].items():
+			lines.append(f'job_scout_stage_latency_ms{{stage="{stage}",quantile="0.5"}} {s["p50_ms"]:.3f}')
+			lines.append(f'job_scout_stage_latency_ms{{stage="{stage}",quantile="0.95"}} {s["p95_ms"]:.3f}')
+
+		lines += [
+			f"# HELP job_scout_stage_latency_rolling_ms Latência móvel das últimas {self.ROLLING_RUNS} execuções",
+			"# TYPE job_scout_stage_latency_rolling_ms gauge",
+		]
+		for stage, s in self.rolling_stages().items():
+			lines.append(f'job_scout_stage_latency_rolling_ms{{stage="{stage}",quantile="0.5"}} {s["p50_ms"]:.3f}')
+			lines.append(f'job_scout_stage_latency_rolling_ms{{stage="{stage}",quantile="0.95"}} {s["p95_ms"]:.3f}')
+
+		# Grava num arquivo temporário e renomeia: o node_exporter nunca lê um arquivo pela metade
+		textfile_dir = os.path.dirname(self.textfile_path)
+		if textfile_dir:
+			os.makedirs(textfile_dir, exist_ok=True)
+		tmp_path = f"{self.textfile_path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			f.write("\n".join(lines) + "\n")
+		os.replace(tmp_path, self.textfile_path)
+
+
+def parse_prices(value):
+	if not value:
+		return {}
+	try:
+		return json.loads(value)
+	except ValueError:
+		logger.error("LLM_PRICES inválido; use JSON no formato {\"modelo\": [entrada, saída]}")
+		return {}
+
+
+telemetry = Telemetry()
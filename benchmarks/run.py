@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from app.config import config
+from app.daemon import process_tree_rss_mb
+from app.logger import logger
+from app.pipeline import Pipeline
+from .server import FixtureServer
+
+
+class SinkNotifier:
+	def __init__(self):
+		self.sent = 0
+
+	def notify_job(self, job_data, score_result):
+		self.sent += 1
+		return True
+
+
+class StageTimer:
+	def __init__(self):
+		self.samples = defaultdict(list)
+		self.started = time.perf_counter()
+		self.first_evaluation_s = None
+
+	def wrap(self, stage, fn):
+		def timed(*args, **kwargs):
+			started = time.perf_counter()
+			try:
+				return fn(*args, **kwargs)
+			finally:
+				finished = time.perf_counter()
+				self.samples[stage].append(finished - started)
+				if stage.startswith("evaluate") and self.first_evaluation_s is None:
+					self.first_evaluation_s = finished - self.started
+		return timed
+
+	async def wrap_producer(self, stage, producer):
+		# Mede o tempo entre um item e o próximo, que é o custo de coleta de cada vaga
+		started = time.perf_counter()
+		async for item in producer:
+			self.samples[stage].append(time.perf_counter() - started)
+			yield item
+			started = time.perf_counter()
+
+	def summary(self):
+		summary = {}
+		for stage, samples in self.samples.items():
+			ordered = sorted(samples)
+			summary[stage] = {
+				"count": len(ordered),
+				"p50_ms": statistics.median(ordered) * 1000,
+				"p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+				"total_s": sum(ordered),
+			}
+		return summary
+
+
+class MemorySampler:
+	def __init__(self, interval_s=0.1):
+		self.interval_s = interval_s
+		self.peak_mb = 0.0
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, daemon=True)
+
+	def _run(self):
+		while not self._stop.is_set():
+			self.peak_mb = max(self.peak_mb, process_tree_rss_mb(os.getpid()) or 0.0)
+			self._stop.wait(self.interval_s)
+
+	def __enter__(self):
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc):
+		self._stop.set()
+		self._thread.join()
+
+
+async def synthetic_jobs(server):
+	for job in server.data.jobs:
+		yield {
+			"source": "meu-padrinho",
+			"title": job["title"],
+			"company": job["company"],
+			"description": "; ".join(job["items"]),
+			"link": f"{server.url}/vagas/{job['slug']}",
+			"subscription_link": None,
+		}
+
+
+def configure(server, workdir, args, n_jobs):
+	config.db_path = os.path.join(workdir, "jobs.db")
+	config.api_key = config.api_key or "benchmark"
+	config.llm_base_url = f"{server.url}/v1"
+	config.llm_backoff = 0.05
+	config.llm_batch_size = args.llm_batch_size
+	config.escalation_model = None
+	config.meu_padrinho_url = server.url
+	config.linkedin_url = server.url
+	config.linkedin_session_path = os.path.join(workdir, "linkedin_session.json")
+	config.linkedin_jitter_min = config.linkedin_jitter_max = 0
+	config.linkedin_max_scrolls = n_jobs // server.page_size + 1
+	config.pipeline_llm_workers = args.llm_workers
+
+
+async def bench(n_jobs, args):
+	from app import runner
+
+	server = FixtureServer(
+		n_jobs=n_jobs,
+		llm_latency_s=args.llm_latency,
+		llm_failure_rate=args.llm_failure_rate,
+	).start()
+
+	with tempfile.TemporaryDirectory() as workdir:
+		configure(server, workdir, args, n_jobs)
+		sink = SinkNotifier()
+		runner.setup(notifier_override=sink)
+		timer = StageTimer()
+
+		pipeline = Pipeline(
+			evaluate=timer.wrap("evaluate", runner.evaluate_job),
+			evaluate_batch=timer.wrap("evaluate_batch", runner.evaluate_jobs),
+			llm_batch_size=config.llm_batch_size,
+			notify=timer.wrap("notify", runner.notify_job),
+			save=timer.wrap("save", runner.save_jobs),
+			llm_workers=config.pipeline_llm_workers,
+			queue_size=config.pipeline_queue_size,
+		)
+
+		with MemorySampler() as memory:
+			started = time.perf_counter()
+			if args.no_browser:
+				stats = await pipeline.run([timer.wrap_producer("scrape", synthetic_jobs(server))])
+			else:
+				stats = await run_with_browser(runner, pipeline, timer, server, args)
+			elapsed = time.perf_counter() - started
+
+		runner.close()
+
+	server.stop()
+	return {
+		"jobs": n_jobs,
+		"elapsed_s": elapsed,
+		"jobs_per_minute": stats["evaluated"] / elapsed * 60 if elapsed else 0,
+		"first_evaluation_s": timer.first_evaluation_s,
+		"pipeline": stats,
+		"stages": timer.summary(),
+		"peak_rss_mb": memory.peak_mb,
+		"llm_calls": server.llm_calls,
+		"llm_failures": server.llm_failures,
+		"notified": sink.sent,
+	}
+
+
+async def run_with_browser(runner, pipeline, timer, server, args):
+	from patchright.async_api import async_playwright
+	from app.linkedin_scraper import LinkedinScraper
+	from app.scraper import Scraper
+	from app.sources.linkedin import LinkedinSource
+	from app.sources.meu_padrinho import MeuPadrinhoSource
+
+	# O fim da listagem é detectado por timeout; no servidor local ele pode ser curto
+	Scraper.LOAD_MORE_TIMEOUT_MS = 1500
+	LinkedinScraper.SCROLL_TIMEOUT_MS = 1500
+	os.makedirs("data/screenshots", exist_ok=True)
+
+	async with async_playwright() as p:
+		browser = await p.chromium.launch()
+		blocker = runner.build_blocker()
+		producers = []
+
+		if "meu-padrinho" in args.sources:
+			source = MeuPadrinhoSource(runner.db)
+			context = await source.new_context(browser, blocker)
+			producers.append(timer.wrap_producer("scrape_meu_padrinho", source.records(context, backfill=True)))
+
+		if "linkedin" in args.sources:
+			source = LinkedinSource(runner.db, queries=["benchmark"])
+			context = await source.new_context(browser, blocker)
+			await context.add_cookies([{"name": "li_at", "value": "benchmark", "url": server.url}])
+			producers.append(timer.wrap_producer("scrape_linkedin", source.records(context)))
+
+		stats = await pipeline.run(producers)
+		await browser.close()
+		return stats
+
+
+def print_report(results):
+	print()
+	print(f"{'vagas':>6} {'tempo (s)':>10} {'vagas/min':>10} {'1ª aval. (s)':>13} {'pico RSS (MB)':>14} {'LLM':>6} {'falhas':>7}")
+	for r in results:
+		first = f"{r['first_evaluation_s']:.2f}" if r["first_evaluation_s"] is not None else "-"
+		print(
+			f"{r['jobs']:>6} {r['elapsed_s']:>10.2f} {r['jobs_per_minute']:>10.1f} {first:>13} "
+			f"{r['peak_rss_mb']:>14.0f} {r['llm_calls']:>6} {r['llm_failures']:>7}"
+		)
+
+	for r in results:
+		print(f"\nLatência por estágio ({r['jobs']} vagas):")
+		for stage, s in sorted(r["stages"].items()):
+			print(f"  {stage:<20} n={s['count']:<6} p50={s['p50_ms']:>8.1f} ms  p95={s['p95_ms']:>8.1f} ms  total={s['total_s']:.2f} s")
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Benchmark offline do pipeline com fixtures locais e LLM simulado")
+	parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+	parser.add_argument("--sources", nargs="+", default=["meu-padrinho"], choices=["meu-padrinho", "linkedin"])
+	parser.add_argument("--no-browser", action="store_true", help="Alimenta o pipeline direto com as vagas, sem scraping")
+	parser.add_argument("--llm-latency", type=float, default=0.2, help="Latência média (s) do LLM simulado")
+	parser.add_argument("--llm-failure-rate", type=float, default=0.0, help="Fração de chamadas ao LLM que falham com 500")
+	parser.add_argument("--llm-workers", type=int, default=config.pipeline_llm_workers)
+	parser.add_argument("--llm-batch-size", type=int, default=config.llm_batch_size)
+	parser.add_argument("--output", help="Grava os resultados em JSON")
+	parser.add_argument("-v", "--verbose", action="store_true")
+	args = parser.parse_args(argv)
+
+	if not args.verbose:
+		logger.set_level(logging.WARNING)
+
+	results = []
+	for n_jobs in args.sizes:
+		print(f"Rodando benchmark com {n_jobs} vagas...", file=sys.stderr)
+		results.append(asyncio.run(bench(n_jobs, args)))
+
+	print_report(results)
+
+	if args.output:
+		with open(args.output, "w", encoding="utf-8") as f:
+			json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+WORDS = (
+	"produto equipe time squad remoto hibrido clt pj salario beneficios plano saude vale refeicao "
+	"componentes design system acessibilidade testes unitarios e2e cypress vitest jest pinia vuex nuxt "
+	"vite webpack css html sass tailwind figma performance web vitals seo ssr spa pwa api rest graphql "
+	"integracao pagamentos ecommerce fintech healthtech edtech startup escala clientes usuarios dashboard "
+	"relatorios graficos mapas formularios validacao autenticacao permissao monitoramento observabilidade "
+	"git github gitlab ci cd docker code review pareamento mentoria documentacao comunicacao ingles "
+	"espanhol latam brasil portugal home office flexivel horario bonus stock options ferias licenca "
+	"crescimento carreira lideranca autonomia ownership qualidade entrega agil scrum kanban sprint "
+	"backlog roadmap negocio dados analytics experimentos ab testing mobile responsivo navegadores"
+).split()
+
+PLACEHOLDER_PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 20_000
+
+
+def _template(name):
+	return Template((FIXTURES_DIR / name).read_text(encoding="utf-8"))
+
+
+class FixtureData:
+	def __init__(self, n_jobs, seed=42, avoid_ratio=0.2):
+		rng = random.Random(seed)
+		self.jobs = []
+		for i in range(n_jobs):
+			words = rng.sample(WORDS, 30)
+			# Uma parte das vagas cita tecnologias do 'avoid' para exercitar o pré-filtro
+			stack = "java spring" if rng.random() < avoid_ratio else "vue typescript"
+			self.jobs.append({
+				"slug": f"desenvolvedor-frontend-{i}",
+				"post_id": 7_000_000_000 + i,
+				"title": f"Desenvolvedor Frontend {stack.split()[0].title()} #{i}",
+				"company": f"Empresa {i % 97}",
+				"items": [" ".join(words[j:j + 6]) + f" {stack}" for j in range(0, 30, 6)],
+				"text": f"Vaga para pessoa desenvolvedora frontend pleno com {stack}. " + " ".join(words),
+			})
+		self.by_slug = {job["slug"]: job for job in self.jobs}
+
+
+class FixtureServer:
+	def __init__(self, n_jobs=10, page_size=50, llm_latency_s=0.2, llm_failure_rate=0.0, seed=42):
+		self.data = FixtureData(n_jobs, seed=seed)
+		self.page_size = page_size
+		self.llm_latency_s = llm_latency_s
+		self.llm_failure_rate = llm_failure_rate
+		self.llm_calls = 0
+		self.llm_failures = 0
+		self._rng = random.Random(seed)
+		self._lock = threading.Lock()
+		self._templates = {name: _template(f"{name}.html") for name in (
+			"meupadrinho_listing", "meupadrinho_card", "meupadrinho_job",
+			"linkedin_feed", "linkedin_search", "linkedin_post",
+		)}
+		self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+		self._httpd.daemon_threads = True
+		self._thread = None
+
+	@property
+	def url(self):
+		host, port = self._httpd.server_address
+		return f"http://{host}:{port}"
+
+	def start(self):
+		self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self._httpd.shutdown()
+		self._httpd.server_close()
+
+	def render(self, name, **values):
+		return self._templates[name].substitute(**values)
+
+	def cards(self, offset):
+		jobs = self.data.jobs[offset:offset + self.page_size]
+		return "\n".join(self.render("meupadrinho_card", **job) for job in jobs)
+
+	def posts(self, offset):
+		jobs = self.data.jobs[offset:offset + self.page_size]
+		return "\n".join(self.render("linkedin_post", **job) for job in jobs)
+
+	def llm_response(self, payload):
+		with self._lock:
+			self.llm_calls += 1
+			fail = self._rng.random() < self.llm_failure_rate
+			latency = max(0.0, self._rng.gauss(self.llm_latency_s, self.llm_latency_s * 0.2))
+			if fail:
+				self.llm_failures += 1
+
+		time.sleep(latency)
+		if fail:
+			return 500, {"error": {"message": "falha injetada pelo benchmark"}}
+
+		prompt = json.loads(payload["messages"][-1]["content"])
+		if "jobs" in prompt:
+			content = {"results": [dict(_fake_evaluation(job), id=job["id"]) for job in prompt["jobs"]]}
+		else:
+			content = _fake_evaluation(prompt.get("job") or prompt.get("post") or prompt)
+
+		prompt_tokens = len(json.dumps(payload, ensure_ascii=False)) // 4
+		completion = json.dumps(content, ensure_ascii=False)
+		return 200, {
+			"choices": [{"message": {"role": "assistant", "content": completion}}],
+			"usage": {
+				"prompt_tokens": prompt_tokens,
+				"completion_tokens": len(completion) // 4,
+				"total_tokens": prompt_tokens + len(completion) // 4,
+			},
+		}
+
+	def _handler(self):
+		server = self
+
+		class Handler(BaseHTTPRequestHandler):
+			def log_message(self, format, *args):
+				pass
+
+			def _send(self, status, body, content_type="text/html; charset=utf-8"):
+				if isinstance(body, str):
+					body = body.encode("utf-8")
+				self.send_response(status)
+				self.send_header("Content-Type", content_type)
+				self.send_header("Content-Length", str(len(body)))
+				self.end_headers()
+				self.wfile.write(body)
+
+			def do_GET(self):
+				url = urlparse(self.path)
+				query = parse_qs(url.query)
+				offset = int(query.get("offset", ["0"])[0])
+
+				if url.path == "/":
+					self._send(200, server.render(
+						"meupadrinho_listing",
+						cards=server.cards(0),
+						offset=server.page_size,
+						page_size=server.page_size,
+					))
+				elif url.path == "/cards":
+					self._send(200, server.cards(offset))
+				elif url.path.startswith("/vagas/"):
+					job = server.data.by_slug.get(url.path.rsplit("/", 1)[-1])
+					if not job:
+						self._send(404, "not found")
+						return
+					self._send(200, server.render(
+						"meupadrinho_job",
+						title=job["title"],
+						company=job["company"],
+						items="".join(f"<li>{item}</li>" for item in job["items"]),
+						apply_link=f"{server.url}/candidatura/{job['slug']}",
+					))
+				elif url.path.startswith("/feed"):
+					self._send(200, server.render("linkedin_feed"))
+				elif url.path.startswith("/search/results/content"):
+					self._send(200, server.render(
+						"linkedin_search",
+						posts=server.posts(0),
+						offset=server.page_size,
+						page_size=server.page_size,
+					))
+				elif url.path == "/posts":
+					self._send(200, server.posts(offset))
+				elif url.path.endswith(".png"):
+					self._send(200, PLACEHOLDER_PNG, "image/png")
+				elif url.path.endswith(".css"):
+					self._send(200, "body { font-family: sans-serif; }", "text/css")
+				else:
+					self._send(404, "not found")
+
+			def do_POST(self):
+				if not self.path.endswith("/chat/completions"):
+					self._send(404, "not found")
+					return
+
+				length = int(self.headers.get("Content-Length") or 0)
+				status, body = server.llm_response(json.loads(self.rfile.read(length)))
+				self._send(status, json.dumps(body, ensure_ascii=False), "application/json")
+
+		return Handler
+
+
+def _fake_evaluation(job):
+	# Score determinístico derivado do conteúdo: a mesma vaga sempre recebe a mesma nota
+	digest = hashlib.sha256(json.dumps(job, sort_keys=True, ensure_ascii=False).encode("utf-8")).digest()
+	score = digest[0] * 100 // 255
+	return {
+		"score": score,
+		"decision": "apply" if score >= 60 else "skip",
+		"confidence": round(0.5 + digest[1] / 510, 2),
+		"reasons": ["Avaliação sintética do benchmark"],
+		"matched_skills": ["vue"],
+		"missing_skills": [],
+		"notes": "",
+		"title": job.get("title", "") if isinstance(job, dict) else "",
+		"company": job.get("company", "") if isinstance(job, dict) else "",
+	}